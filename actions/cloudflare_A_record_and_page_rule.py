@@ -1,77 +1,87 @@
 from utils.config import CLOUDFLARE, DOMAINS
-from services.cloudflare_functions import create_a_record, delete_a_record, update_a_record, get_zone_id, check_zone_exists, create_new_zone, first_account_id, a_record_exists
-from services.cloudflare_functions import create_page_rule, delete_page_rule, update_page_rule
+from utils.concurrency import run_for_domains
+from services.cloudflare_functions import cf_retry_stats
+from services.cloudflare_functions import create_a_record, delete_a_record, update_a_record, get_zone_id, get_or_create_zone, a_record_exists
+from services.cloudflare_functions import create_page_rule, delete_page_rule, update_page_rule, page_rule_select_for
+from functools import partial
 import requests
 
-def add_cloudflare_A_record_and_page_rule(domains):
+def add_cloudflare_A_record_and_page_rule(domains, max_workers=None):
     """
     This is the workflow for adding an A record and page rule to a domain in Cloudflare.
     """
     if CLOUDFLARE['ADD_A_RECORD'] == True and CLOUDFLARE['ADD_PAGERULE'] == True:
-        for domain in domains:
-            exists, zone_data = check_zone_exists(domain, CLOUDFLARE['CF_API_TOKEN'])
-            if not exists:
-                print(f"Creating new zone for {domain}")
-                zone_data = create_new_zone(first_account_id(CLOUDFLARE['CF_API_TOKEN']), domain, CLOUDFLARE['CF_API_TOKEN'])
-                print(f"New zone created for {domain}")
-                print(zone_data)
-            zone_id = zone_data['id']
-            try:
-                create_a_record(zone_id, domain, CLOUDFLARE['IP'])
-            except requests.exceptions.HTTPError as e:
-                print(f"Error creating A record: {e}")
-                print(f"Response: {e.response.text}")
-                raise
-            print(f"Creating page rule for {domain}")
-            try:
-                create_page_rule(zone_id, domain)
-            except requests.exceptions.HTTPError as e:
-                print(f"Error creating page rule: {e}")
-                print(f"Response: {e.response.text}")
-                raise
+        return run_for_domains(_add_A_record_and_page_rule, domains, max_workers or CLOUDFLARE['MAX_WORKERS'], stats=cf_retry_stats)
 
-def delete_cloudflare_A_record_and_page_rule(domains):
+def _add_A_record_and_page_rule(domain):
+    zone_id = get_or_create_zone(domain, CLOUDFLARE['CF_API_TOKEN'])['id']
+    try:
+        create_a_record(zone_id, domain, CLOUDFLARE['IP'])
+    except requests.exceptions.HTTPError as e:
+        print(f"Error creating A record: {e}")
+        print(f"Response: {e.response.text}")
+        raise
+    print(f"Creating page rule for {domain}")
+    try:
+        create_page_rule(zone_id, domain)
+    except requests.exceptions.HTTPError as e:
+        print(f"Error creating page rule: {e}")
+        print(f"Response: {e.response.text}")
+        raise
+
+def delete_cloudflare_A_record_and_page_rule(domains, max_workers=None, select=None, old_url=None):
     """
     This is the workflow for deleting an A record and page rule from a domain in Cloudflare.
     """
     if CLOUDFLARE['DELETE_A_RECORD'] == True and CLOUDFLARE['DELETE_PAGERULE'] == True:
-        for domain in domains:
-            zone_id = get_zone_id(domain)
-            exists = a_record_exists(zone_id, domain)
-            if exists:
-                delete_a_record(zone_id, domain)
-                print(f"Deleted A record for {domain}")
-            else:
-                print(f"A record for {domain} does not exist")
-            try:
-                delete_page_rule(zone_id, domain)
-            except requests.exceptions.HTTPError as e:
-                print(f"Error deleting page rule: {e}")
-                print(f"Response: {e.response.text}")
-                raise
+        max_workers = max_workers or CLOUDFLARE['MAX_WORKERS']
+        task = partial(_delete_A_record_and_page_rule, select=page_rule_select_for(select, max_workers), old_url=old_url)
+        return run_for_domains(task, domains, max_workers, stats=cf_retry_stats)
+
+def _delete_A_record_and_page_rule(domain, select=None, old_url=None):
+    zone_id = get_zone_id(domain)
+    exists = a_record_exists(zone_id, domain)
+    report = None
+    if exists:
+        report = delete_a_record(zone_id, domain)
+        print(f"Deleted A record for {domain}")
+    else:
+        print(f"A record for {domain} does not exist")
+    try:
+        delete_page_rule(zone_id, domain, select, old_url)
+    except requests.exceptions.HTTPError as e:
+        print(f"Error deleting page rule: {e}")
+        print(f"Response: {e.response.text}")
+        raise
+    return report
 
-def update_cloudflare_A_record_and_page_rule(domains):
+def update_cloudflare_A_record_and_page_rule(domains, max_workers=None, select=None, old_url=None):
     """
     This is the workflow for updating an A record and page rule for a domain in Cloudflare.
     """
     if CLOUDFLARE['CHANGE_A_RECORD'] == True and CLOUDFLARE['CHANGE_PAGERULE'] == True:
-        for domain in domains:
-            zone_id = get_zone_id(domain)
-            exists = a_record_exists(zone_id, domain)
-            if not exists:
-                print(f"A record for {domain} does not exist")
-                continue
-            print(f"Updating A record for {domain}")
-            try:
-                update_a_record(zone_id, domain, CLOUDFLARE['IP'])
-            except requests.exceptions.HTTPError as e:
-                print(f"Error updating A record: {e}")
-                print(f"Response: {e.response.text}")
-                raise
-            print(f"Updating page rule for {domain}")
-            try:
-                update_page_rule(zone_id, domain, CLOUDFLARE["NEW_TARGET_URL"])
-            except requests.exceptions.HTTPError as e:
-                print(f"Error updating page rule: {e}")
-                print(f"Response: {e.response.text}")
-                raise
\ No newline at end of file
+        max_workers = max_workers or CLOUDFLARE['MAX_WORKERS']
+        task = partial(_update_A_record_and_page_rule, select=page_rule_select_for(select, max_workers), old_url=old_url)
+        return run_for_domains(task, domains, max_workers, stats=cf_retry_stats)
+
+def _update_A_record_and_page_rule(domain, select=None, old_url=None):
+    zone_id = get_zone_id(domain)
+    exists = a_record_exists(zone_id, domain)
+    if not exists:
+        print(f"A record for {domain} does not exist")
+        return
+    print(f"Updating A record for {domain}")
+    try:
+        report = update_a_record(zone_id, domain, CLOUDFLARE['IP'])
+    except requests.exceptions.HTTPError as e:
+        print(f"Error updating A record: {e}")
+        print(f"Response: {e.response.text}")
+        raise
+    print(f"Updating page rule for {domain}")
+    try:
+        update_page_rule(zone_id, domain, CLOUDFLARE["NEW_TARGET_URL"], select=select, old_url=old_url)
+    except requests.exceptions.HTTPError as e:
+        print(f"Error updating page rule: {e}")
+        print(f"Response: {e.response.text}")
+        raise
+    return report
\ No newline at end of file
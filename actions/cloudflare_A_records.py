@@ -1,54 +1,58 @@
 from utils.config import CLOUDFLARE, DOMAINS
-from services.cloudflare_functions import create_a_record, delete_a_record, update_a_record, get_zone_id, check_zone_exists, create_new_zone, first_account_id, a_record_exists
+from utils.concurrency import run_for_domains
+from services.cloudflare_functions import cf_retry_stats
+from services.cloudflare_functions import create_a_record, delete_a_record, update_a_record, get_zone_id, get_or_create_zone, a_record_exists
 import requests
 
-def add_cloudflare_A_records(domains):
+def add_cloudflare_A_records(domains, max_workers=None):
     """
     This is the workflow for adding an A record to a domain in Cloudflare.
     """
     if CLOUDFLARE['ADD_A_RECORD'] == True and CLOUDFLARE['ADD_PAGERULE'] == False:
-        for domain in domains:
-            exists, zone_data = check_zone_exists(domain, CLOUDFLARE['CF_API_TOKEN'])
-            if not exists:
-                print(f"Creating new zone for {domain}")
-                zone_data = create_new_zone(first_account_id(CLOUDFLARE['CF_API_TOKEN']), domain, CLOUDFLARE['CF_API_TOKEN'])
-                print(f"New zone created for {domain}")
-                print(zone_data)
-            zone_id = zone_data['id']
-            try:
-                create_a_record(zone_id, domain, CLOUDFLARE['IP'])
-            except requests.exceptions.HTTPError as e:
-                print(f"Error creating A record: {e}")
-                print(f"Response: {e.response.text}")
-                raise
+        return run_for_domains(_add_A_record, domains, max_workers or CLOUDFLARE['MAX_WORKERS'], stats=cf_retry_stats)
 
-def delete_cloudflare_A_records(domains):
+def _add_A_record(domain):
+    zone_id = get_or_create_zone(domain, CLOUDFLARE['CF_API_TOKEN'])['id']
+    try:
+        return create_a_record(zone_id, domain, CLOUDFLARE['IP'])
+    except requests.exceptions.HTTPError as e:
+        print(f"Error creating A record: {e}")
+        print(f"Response: {e.response.text}")
+        raise
+
+def delete_cloudflare_A_records(domains, max_workers=None):
     """
     This is the workflow for deleting an A record from a domain in Cloudflare.
     """
     if CLOUDFLARE['DELETE_A_RECORD'] == True and CLOUDFLARE['DELETE_PAGERULE'] == False:
-        for domain in domains:
-            zone_id = get_zone_id(domain)
-            exists = a_record_exists(zone_id, domain)
-            if exists:
-                delete_a_record(zone_id, domain)
-                print(f"Deleted A record for {domain}")
-            else:
-                print(f"A record for {domain} does not exist")
+        return run_for_domains(_delete_A_record, domains, max_workers or CLOUDFLARE['MAX_WORKERS'], stats=cf_retry_stats)
+
+def _delete_A_record(domain):
+    zone_id = get_zone_id(domain)
+    exists = a_record_exists(zone_id, domain)
+    report = None
+    if exists:
+        report = delete_a_record(zone_id, domain)
+        print(f"Deleted A record for {domain}")
+    else:
+        print(f"A record for {domain} does not exist")
+    return report
 
-def update_cloudflare_A_records(domains):
+def update_cloudflare_A_records(domains, max_workers=None):
     """
     This is the workflow for updating an A record for a domain in Cloudflare.
     """
     if CLOUDFLARE['CHANGE_A_RECORD'] == True and CLOUDFLARE['CHANGE_PAGERULE'] == False:
-        for domain in domains:
-            zone_id = get_zone_id(domain)
-            exists = a_record_exists(zone_id, domain)
-            if not exists:
-                print(f"A record for {domain} does not exist")
-                continue
-            print(f"Updating A record for {domain}")
-            update_a_record(zone_id, domain, CLOUDFLARE['IP'])
+        return run_for_domains(_update_A_record, domains, max_workers or CLOUDFLARE['MAX_WORKERS'], stats=cf_retry_stats)
+
+def _update_A_record(domain):
+    zone_id = get_zone_id(domain)
+    exists = a_record_exists(zone_id, domain)
+    if not exists:
+        print(f"A record for {domain} does not exist")
+        return
+    print(f"Updating A record for {domain}")
+    return update_a_record(zone_id, domain, CLOUDFLARE['IP'])
 
 # add_cloudflare_A_records(DOMAINS)
 # delete_cloudflare_A_records(DOMAINS)
@@ -1,65 +1,90 @@
 import pandas as pd
-from utils.config import PORKBUN, CLOUDFLARE
-from services.porkbun_functions import get_all_domains_with_nameservers, update_domain_nameservers
-from services.cloudflare_functions import add_domains_to_cloudflare
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from utils.config import PORKBUN, CLOUDFLARE, DOMAINS
+from services.porkbun_functions import get_nameservers, update_domain_nameservers
+from services.cloudflare_functions import create_zone, first_account_id
 
-def update_cloudflare_nameservers():
+RESULT_COLUMNS = ['domain', 'service', 'other_ns', 'cloudflare_ns', 'same_ns', 'updated', 'error']
+
+def update_cloudflare_nameservers(domains=None):
     """
-    This is the workflow for updating the nameservers for a domain in Cloudflare and adding them to Porkbun.
+    This is the workflow for adding domains to Cloudflare and pointing their Porkbun nameservers at Cloudflare.
+    Each domain streams through three stages as soon as the previous one finishes for it:
+    Porkbun NS read -> Cloudflare zone creation -> Porkbun NS update (only when the sets differ).
+    `domains` may be any iterable, e.g. iter_domain_names() to stream the whole Porkbun account.
     """
     if CLOUDFLARE['CHANGE_NAMESERVERS'] == True:
-        print("📋 Getting Porkbun domains and nameservers...")
-        porkbun_data = get_all_domains_with_nameservers()
-        domains_to_add = []
-        for domain in CLOUDFLARE['DOMAINS']:
-            if domain not in porkbun_data:
-                print(f"❌ {domain} is not in Porkbun")
-                continue
-            else:
+        account_id = first_account_id(CLOUDFLARE['CF_API_TOKEN'])
+        results = {}
+
+        with ThreadPoolExecutor(PORKBUN['MAX_WORKERS']) as read_pool, \
+             ThreadPoolExecutor(CLOUDFLARE['MAX_WORKERS']) as zone_pool, \
+             ThreadPoolExecutor(PORKBUN['MAX_WORKERS']) as update_pool:
+
+            def finish(domain, other_ns=None, cloudflare_ns=None, updated=None, error=None):
+                results[domain].set_result({
+                    'domain': domain,
+                    'service': 'porkbun',
+                    'other_ns': other_ns,
+                    'cloudflare_ns': cloudflare_ns,
+                    'same_ns': same_nameservers(other_ns, cloudflare_ns) if other_ns and cloudflare_ns else False,
+                    'updated': updated,
+                    'error': error,
+                })
+
+            def read_stage(domain):
+                try:
+                    porkbun_ns = get_nameservers(domain, PORKBUN['PORKBUN_KEY'], PORKBUN['PORKBUN_SECRET'])
+                except Exception as e:
+                    return finish(domain, error=f"Porkbun read failed: {e}")
+                # get_nameservers reports failures as 'error'/'api_error'/'unexpected_error' rather than raising.
+                if not isinstance(porkbun_ns, list):
+                    print(f"❌ {domain} Porkbun read failed ({porkbun_ns})")
+                    return finish(domain, error=f"Porkbun read failed: {porkbun_ns}")
+                if not porkbun_ns:
+                    print(f"❌ {domain} is not in Porkbun")
+                    return finish(domain, error="not in Porkbun")
                 print(f"✅ {domain} is in Porkbun")
-        
-        print("☁️  Adding domains to Cloudflare...")
-        domains = list(porkbun_data.keys())
-        cloudflare_data = add_domains_to_cloudflare(domains)
-        
-        print("🔍 Comparing nameservers...")
-        domain_classification = {}
-        for domain in domains:
-            domain_classification[domain] = [
-                domain, 
-                'porkbun', 
-                porkbun_data[domain], 
-                cloudflare_data[domain]
-            ]
+                zone_pool.submit(zone_stage, domain, porkbun_ns)
 
-        for domain in domains:
-            if porkbun_data[domain] == cloudflare_data[domain]:
-                print(f"✅ {domain} has matching nameservers")
-                continue
-            else:
+            def zone_stage(domain, porkbun_ns):
+                try:
+                    cloudflare_ns = list(create_zone(account_id, domain, CLOUDFLARE['CF_API_TOKEN']))
+                except Exception as e:
+                    return finish(domain, porkbun_ns, error=f"Cloudflare zone failed: {e}")
+                if same_nameservers(porkbun_ns, cloudflare_ns):
+                    print(f"✅ {domain} has matching nameservers")
+                    return finish(domain, porkbun_ns, cloudflare_ns)
                 print(f"❌ {domain} has different nameservers")
-                domains_to_add.append(domain)
-        
-        df = pd.DataFrame(domain_classification.values(), 
-                        columns=['domain', 'service', 'other_ns', 'cloudflare_ns'])
-        df['same_ns'] = df['other_ns'] == df['cloudflare_ns']
-        
-        update_nameservers_if_needed(df)
-        
+                update_pool.submit(update_stage, domain, porkbun_ns, cloudflare_ns)
+
+            def update_stage(domain, porkbun_ns, cloudflare_ns):
+                print(f"   → Updating {domain}")
+                try:
+                    status = update_domain_nameservers(domain, cloudflare_ns)
+                except Exception as e:
+                    return finish(domain, porkbun_ns, cloudflare_ns, error=f"Porkbun update failed: {e}")
+                if status != 'SUCCESS':
+                    return finish(domain, porkbun_ns, cloudflare_ns, error=f"Porkbun update returned {status}")
+                finish(domain, porkbun_ns, cloudflare_ns, updated=status)
+
+            print("🔄 Migrating nameservers...")
+            for domain in DOMAINS if domains is None else domains:
+                if domain in results:
+                    continue
+                results[domain] = Future()
+                read_pool.submit(read_stage, domain)
+            wait(results.values())
+
+        df = pd.DataFrame([future.result() for future in results.values()], columns=RESULT_COLUMNS)
+        updated = df['updated'].notna().sum()
+        failed = df['error'].notna().sum()
+        print(f"✅ {updated} updated, {len(df) - updated - failed} already matching, ❌ {failed} failed")
         return df
 
-def update_nameservers_if_needed(df):
-    """Update nameservers for domains that don't match Cloudflare."""
-    domains_to_update = df[df['same_ns'] == False]
-    
-    if len(domains_to_update) == 0:
-        print("✅ All domains already have matching nameservers!")
-        return
-    
-    print(f"🔄 Updating nameservers for {len(domains_to_update)} domains...")
-    
-    for index, row in domains_to_update.iterrows():
-        print(f"   → Updating {row['domain']}")
-        update_domain_nameservers(row['domain'], row['cloudflare_ns'])
+def same_nameservers(a, b):
+    """Compare two nameserver lists ignoring order, case and trailing dots."""
+    normalize = lambda ns: {n.lower().rstrip('.') for n in ns}
+    return normalize(a) == normalize(b)
 
 # update_cloudflare_nameservers()
\ No newline at end of file
@@ -1,28 +1,37 @@
 from utils.config import CLOUDFLARE, DOMAINS
-from services.cloudflare_functions import create_page_rule, delete_page_rule, update_page_rule, get_zone_id
+from utils.concurrency import run_for_domains
+from services.cloudflare_functions import cf_retry_stats
+from services.cloudflare_functions import create_page_rule, delete_page_rule, update_page_rule, get_zone_id, page_rule_select_for
 
 """
 For creating and deleting a page rule, make sure to add your target url in the config.py file.
 For updating a page rule, make sure to add your new target url in the config.py file.
+Set CLOUDFLARE['MAX_WORKERS'] (or pass max_workers) to process several domains at once.
+Updates and deletes pick rules by `select` (default CLOUDFLARE['PAGE_RULE_SELECT']); "prompt" needs max_workers=1.
 """
 
-def add_cloudflare_page_rule(domains):
+def add_cloudflare_page_rule(domains, max_workers=None):
     if CLOUDFLARE['ADD_PAGERULE'] == True and CLOUDFLARE['ADD_A_RECORD'] == False:
-        for domain in domains:
-            zone_id = get_zone_id(domain)
-            create_page_rule(zone_id, domain)
+        return run_for_domains(
+            lambda domain: create_page_rule(get_zone_id(domain), domain),
+            domains, max_workers or CLOUDFLARE['MAX_WORKERS'], stats=cf_retry_stats)
 
-def delete_cloudflare_page_rule(domains):
+def delete_cloudflare_page_rule(domains, max_workers=None, select=None, old_url=None):
     if CLOUDFLARE['DELETE_PAGERULE'] == True and CLOUDFLARE['DELETE_A_RECORD'] == False:
-        for domain in domains:
-            zone_id = get_zone_id(domain)
-            delete_page_rule(zone_id, domain)
+        max_workers = max_workers or CLOUDFLARE['MAX_WORKERS']
+        select = page_rule_select_for(select, max_workers)
+        return run_for_domains(
+            lambda domain: delete_page_rule(get_zone_id(domain), domain, select, old_url),
+            domains, max_workers, stats=cf_retry_stats)
 
-def update_cloudflare_page_rule(domains):
+def update_cloudflare_page_rule(domains, max_workers=None, select=None, old_url=None):
     if CLOUDFLARE['CHANGE_PAGERULE'] == True and CLOUDFLARE['CHANGE_A_RECORD'] == False:
-        for domain in domains:
-            zone_id = get_zone_id(domain)
-            update_page_rule(zone_id, domain, CLOUDFLARE["NEW_TARGET_URL"])
+        max_workers = max_workers or CLOUDFLARE['MAX_WORKERS']
+        select = page_rule_select_for(select, max_workers)
+        return run_for_domains(
+            lambda domain: update_page_rule(get_zone_id(domain), domain, CLOUDFLARE["NEW_TARGET_URL"],
+                                            select=select, old_url=old_url),
+            domains, max_workers, stats=cf_retry_stats)
 
 # add_cloudflare_page_rule(DOMAINS)
 # delete_cloudflare_page_rule(DOMAINS)
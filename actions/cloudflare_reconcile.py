@@ -0,0 +1,34 @@
+from utils.config import CLOUDFLARE, DOMAINS
+from utils.concurrency import run_for_domains
+from services.cloudflare_functions import cf_retry_stats, drop_snapshot
+from services.cloudflare_reconcile import plan_domain, print_plan, apply_plan
+
+def reconcile_cloudflare(domains, dry_run=None, max_workers=None):
+    """
+    This is the workflow for converging A records and page rules to the configured IP, proxy flag and target URL.
+    It always prints the plan; with DRY_RUN off it then applies only the changes.
+    """
+    if CLOUDFLARE['RECONCILE'] == True:
+        dry_run = CLOUDFLARE['DRY_RUN'] if dry_run is None else dry_run
+        max_workers = max_workers or CLOUDFLARE['MAX_WORKERS']
+
+        # Plan from fresh state, not from snapshots an earlier workflow in this process left behind.
+        drop_snapshot()
+        print("🔍 Reading current state...")
+        results = run_for_domains(
+            lambda domain: plan_domain(domain, CLOUDFLARE['IP'], CLOUDFLARE['PROXIED'], CLOUDFLARE['TARGET_URL']),
+            domains, max_workers, stats=cf_retry_stats)
+        plans = [r['result'] for r in results if r['ok']]
+        print_plan(plans)
+
+        if dry_run:
+            print("Dry run – nothing applied")
+            return plans
+
+        print("🔄 Applying changes...")
+        pending = {plan['domain']: plan for plan in plans
+                   if any(c['action'] != 'noop' for c in plan['changes'])}
+        run_for_domains(lambda domain: apply_plan(pending[domain]), list(pending), max_workers, stats=cf_retry_stats)
+        return plans
+
+# reconcile_cloudflare(DOMAINS)
\ No newline at end of file
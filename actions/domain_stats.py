@@ -1,28 +1,24 @@
 import requests
-from services.bison_domains import get_bison_accounts, extract_domains, turn_into_df, get_domain_tags, add_account_count, workspace_details, grabbing_ESP, calculating_reply_rate
-from services.porkbun_functions import get_dns_records, get_domains, get_nameservers, get_forwarding
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from services.bison_domains import get_bison_accounts_df, get_bison_pages, drop_duplicate_domains, workspace_details
+from services.bison_stats import DomainStatsAggregator, domain_stats
+from services.bison_snapshot import BisonSnapshot, diff_accounts
+from services.stats_history import StatsHistory
+from services.domain_index import DomainIndex
+from services.porkbun_functions import get_dns_records_cached, iter_domains_cached, get_nameservers_cached, get_forwarding_cached
 from services.cloudflare_functions import get_zone_id, get_a_records
-from utils.config import EMAILBISON, PORKBUN, CLOUDFLARE
+from utils.concurrency import run_for_domains
+from utils.config import EMAILBISON, PORKBUN, CLOUDFLARE, REPORTS
+from utils.report_writer import write_report
+import numpy as np
 import pandas as pd
 
 def grab_all_domains(api_key):
     """
     This is the workflow for grabbing all domains from a Bison workspace.
     """
-    all_data = []
-    
-    data, next_page = get_bison_accounts(api_key)
-    all_data.extend(data)
-    
-    page = 0
-    while next_page:
-        page += 1
-        data, next_page = get_bison_accounts(api_key, page)
-        all_data.extend(data)
-        print(f"Page {page} processed")
-    
-    final_df = turn_into_df(all_data)
-    df_domains, df_accounts = extract_domains(final_df)
+    df_accounts = get_bison_accounts_df(api_key)
+    df_domains = pd.DataFrame({'domain': df_accounts['domain'].cat.categories})
 
     return df_accounts, df_domains
 
@@ -30,113 +26,216 @@ def calculate_bison_domain_stats(df_accounts, df_domains, api_key):
     """ 
     This is the workflow for calculating some stats for domains in a Bison workspace.
     """
-    df_domains = get_domain_tags(df_accounts, df_domains)
-    df_domains = add_account_count(df_accounts, df_domains)
+    df_domains = drop_duplicate_domains(df_domains)
+    return domain_stats_table(df_domains, domain_stats(df_accounts), api_key)
+
+def get_workspace(api_key):
+    """
+    This is the function for getting the (id, name) of a Bison workspace.
+    """
     workspace_info = workspace_details(api_key)
     try:
         workspaces = workspace_info.get('workspace', {})
-        workspace_id = workspaces.get('id')
-        workspace_name = workspaces.get('name')
+        return workspaces.get('id'), workspaces.get('name')
     except Exception as e:
         print(f"Error getting workspace details: {e}")
-        workspace_id = None
-        workspace_name = None
-    df_domains['workspace_id'] = workspace_id
-    df_domains['workspace_name'] = workspace_name
-    
-    df_domains = grabbing_ESP(df_accounts, df_domains)
-    df_domains = calculating_reply_rate(df_accounts, df_domains)
+        return None, None
+
+def domain_stats_table(df_domains, stats, api_key):
+    """
+    This is the function for laying out per-domain stats as the domain table we save.
+    """
+    df_domains = df_domains.join(stats[['tags', 'accounts']], on='domain')
+    df_domains['workspace_id'], df_domains['workspace_name'] = get_workspace(api_key)
+    df_domains = df_domains.join(stats[['ESP', 'reply_rate']], on='domain')
+    return df_domains.reset_index(drop=True)
+
+def stream_bison_domain_stats(api_key):
+    """
+    This is the workflow for calculating a Bison workspace's domain stats while its pages download.
+    Each page is folded into running per-domain totals and then dropped, so no accounts are kept.
+    """
+    aggregator = DomainStatsAggregator()
+    get_bison_pages(api_key, on_page=aggregator.add_page)
+    stats = aggregator.to_frame()
+    return domain_stats_table(pd.DataFrame({'domain': stats.index}), stats, api_key)
+
+def sync_bison_domain_stats(api_key):
+    """
+    This is the workflow for refreshing a Bison workspace's domain stats incrementally.
+    Accounts are compared with the last snapshot; only domains with added, removed or changed
+    accounts are recomputed and merged into the stored domain table. The first run computes everything.
+    """
+    snapshot = BisonSnapshot(api_key)
+    old_accounts, old_domains = snapshot.load()
+    df_accounts, df_domains = grab_all_domains(api_key)
+
+    if old_accounts is None:
+        print("No Bison snapshot yet – computing every domain")
+        df_domains = calculate_bison_domain_stats(df_accounts, df_domains, api_key)
+        snapshot.save(df_accounts, df_domains)
+        return df_domains
+
+    diff = diff_accounts(old_accounts, df_accounts)
+    domains = diff['domains']
+    print(f"🔁 {len(diff['added'])} added, {len(diff['removed'])} removed, {len(diff['changed'])} changed accounts "
+          f"➔ {len(domains)} domain(s) to recompute")
+
+    if domains:
+        affected = df_accounts['domain'].isin(domains)
+        changed_accounts = df_accounts[affected]
+        changed_domains = df_domains[df_domains['domain'].isin(domains)]
+        if len(changed_accounts):
+            updated = calculate_bison_domain_stats(changed_accounts, changed_domains, api_key)
+        else:
+            updated = changed_domains.iloc[0:0]
+        kept = old_domains[~old_domains['domain'].isin(domains)]
+        df_domains = pd.concat([kept, updated], ignore_index=True)
+        # Same row order as a full run: first-seen order of the accounts.
+        order = {domain: i for i, domain in enumerate(df_accounts['domain'].cat.categories)}
+        df_domains = df_domains.sort_values('domain', key=lambda s: s.map(order)).reset_index(drop=True)
+    else:
+        df_domains = old_domains
+
+    snapshot.save(df_accounts, df_domains)
     return df_domains
 
-def calculate_porkbun_domain_stats(df_domains, PORKBUN_KEY, PORKBUN_SECRET, CF_API_TOKEN):
+def workspace_domain_stats(api_key):
+    """
+    This is the workflow for one workspace's domain table, using the configured mode (streaming, incremental or full).
+    """
+    if EMAILBISON["STREAM_STATS"] == True:
+        return stream_bison_domain_stats(api_key)
+    if EMAILBISON["INCREMENTAL"] == True:
+        return sync_bison_domain_stats(api_key)
+    df_accounts, df_domains = grab_all_domains(api_key)
+    print("Domains grabbed")
+    return calculate_bison_domain_stats(df_accounts, df_domains, api_key)
+
+def all_workspaces_domain_stats(api_keys, max_workspaces=None):
+    """
+    This is the workflow for calculating domain stats for many workspaces at once.
+    Each workspace paginates and calculates in its own thread, so a run takes about as long as the slowest one.
+    A failing workspace is reported and left out. Returns one table keyed by workspace_id.
+    """
+    labels = {f"workspace #{i + 1}": api_key for i, api_key in enumerate(api_keys)}
+    results = run_for_domains(lambda label: workspace_domain_stats(labels[label]), list(labels),
+                              max_workspaces or EMAILBISON["MAX_WORKSPACES"])
+    tables = [r['result'] for r in results if r['ok']]
+    if not tables:
+        return pd.DataFrame()
+    df_domains = pd.concat(tables, ignore_index=True)
+    return df_domains.set_index(['workspace_id', 'domain'], drop=False)
+
+def calculate_porkbun_domain_stats(df_domains, PORKBUN_KEY, PORKBUN_SECRET, CF_API_TOKEN,
+                                   porkbun_workers=None, cloudflare_workers=None):
     """
     This is a test workflow for calculating porkbun domain stats. (May not use this)
+    Domains fan out across a Porkbun pool (nameservers, forwarding, DNS records) and, only when
+    Porkbun has no A record, a separate Cloudflare pool. Each pool is also held to its provider's
+    shared rate limiter, so throughput tracks the rate limits rather than N x 5 round trips.
+    Rows come back in listing order.
     """
-    results = []
-    domains = get_domains(PORKBUN_KEY, PORKBUN_SECRET)
-    df_domains['in_porkbun'] = False
-
-    for domain in domains:
-        domain_name = domain.get('domain')
-        status = domain.get('status')
-        # Get tags
-        if status == 'ACTIVE':
-            porkbun_tags = domain.get('labels', [])
-            tag_names = [tag.get('title') for tag in porkbun_tags if tag.get('title')]
-        else:
-            tag_names = []
+    rows = {}
 
-        # Get nameservers
-        nameservers = get_nameservers(domain_name, PORKBUN_KEY, PORKBUN_SECRET)
+    with ThreadPoolExecutor(porkbun_workers or PORKBUN['MAX_WORKERS']) as porkbun_pool, \
+         ThreadPoolExecutor(cloudflare_workers or CLOUDFLARE['MAX_WORKERS']) as cloudflare_pool:
 
-        # Get forwarding
-        forwarding = get_forwarding(domain_name, PORKBUN_KEY, PORKBUN_SECRET)
-        if isinstance(forwarding, list) and forwarding:
-            forwarding = forwarding[0].get('location')
-        else:
-            forwarding = None
+        def porkbun_stage(domain_name, row):
+            try:
+                # Get nameservers (a failed lookup goes to `error`, so the column only ever holds lists)
+                nameservers = get_nameservers_cached(domain_name, PORKBUN_KEY, PORKBUN_SECRET)
+                if isinstance(nameservers, list):
+                    row['nameservers'] = nameservers
+                else:
+                    row['error'] = f"nameservers: {nameservers}"
 
-        # Get A record from Porkbun
-        dns_records = get_dns_records(domain_name, PORKBUN_KEY, PORKBUN_SECRET)
-        a_record = None
-        if isinstance(dns_records, list):
-            a_record = next((record.get('content') for record in dns_records if record.get('type') == 'A'), None)
+                # Get forwarding
+                forwarding = get_forwarding_cached(domain_name, PORKBUN_KEY, PORKBUN_SECRET)
+                if isinstance(forwarding, list) and forwarding:
+                    row['forwarding'] = forwarding[0].get('location')
 
-        # If not found, try Cloudflare
-        if not a_record and CF_API_TOKEN:
+                # Get A record from Porkbun
+                dns_records = get_dns_records_cached(domain_name, PORKBUN_KEY, PORKBUN_SECRET)
+                if isinstance(dns_records, list):
+                    row['a_record'] = next((record.get('content') for record in dns_records if record.get('type') == 'A'), None)
+            except Exception as e:
+                print(f"Error getting Porkbun details for {domain_name}: {e}")
+                row['error'] = f"porkbun: {e}"
+
+            # If not found, try Cloudflare
+            if not row['a_record'] and CF_API_TOKEN:
+                cloudflare_pool.submit(cloudflare_stage, domain_name, row)
+            else:
+                rows[domain_name].set_result(row)
+
+        def cloudflare_stage(domain_name, row):
             try:
                 zone_id = get_zone_id(domain_name, CF_API_TOKEN)
                 a_records = get_a_records(zone_id, domain_name, CF_API_TOKEN)
                 if isinstance(a_records, list) and a_records:
-                    a_record = a_records[0].get('content')
+                    row['a_record'] = a_records[0].get('content')
             except Exception as e:
                 print(f"Error getting A record for {domain_name}: {e}")
-                a_record = None
+            rows[domain_name].set_result(row)
 
-        # Check to see if domains are also in EmailBison
-        if domain_name in df_domains['domain'].values:
-            df_domains.loc[df_domains['domain'] == domain_name, 'in_porkbun'] = True
-            in_bison = True
-        else:
-            in_bison = False
-            print(f"Domain {domain_name} is not in EmailBison")
-
-        # Collect all info for this domain
-        results.append({
-            'domain': domain_name,
-            'status': status,
-            'tag_names': tag_names,
-            'nameservers': nameservers,
-            'forwarding': forwarding,
-            'a_record': a_record,
-            'in_bison': in_bison
-        })
-
-    stats_df = pd.DataFrame(results)
-    stats_df.to_csv('porkbun_domains.csv', index=False)
+        for domain in iter_domains_cached(PORKBUN_KEY, PORKBUN_SECRET):
+            domain_name = domain.get('domain')
+            status = domain.get('status')
+            if domain_name in rows:
+                continue
+            # Get tags
+            if status == 'ACTIVE':
+                porkbun_tags = domain.get('labels', [])
+                tag_names = [tag.get('title') for tag in porkbun_tags if tag.get('title')]
+            else:
+                tag_names = []
+            row = {
+                'domain': domain_name,
+                'status': status,
+                'tag_names': tag_names,
+                'nameservers': None,
+                'forwarding': None,
+                'a_record': None,
+                'error': None,
+            }
+            rows[domain_name] = Future()
+            porkbun_pool.submit(porkbun_stage, domain_name, row)
+        wait(rows.values())
+
+    # Check to see if domains are also in EmailBison
+    stats_df = pd.DataFrame([future.result() for future in rows.values()],
+                            columns=['domain', 'status', 'tag_names', 'nameservers', 'forwarding', 'a_record', 'error'])
+    domain_index = DomainIndex(porkbun=stats_df['domain'], bison=df_domains['domain'])
+    stats_df['in_bison'] = domain_index.isin('bison', stats_df['domain'])
+    df_domains['in_porkbun'] = domain_index.isin('porkbun', df_domains['domain'])
+    for domain_name in stats_df.loc[~stats_df['in_bison'], 'domain']:
+        print(f"Domain {domain_name} is not in EmailBison")
+
+    write_report(stats_df, 'porkbun_domains')
     return stats_df, df_domains
 
-def find_registrar(df_domains):
+def find_registrar(df_domains, domain_index=None):
     """
     Function will be used to find registrar of domains in the future.
+    `domain_index` needs a "porkbun" listing; by default it is built from the (cached) Porkbun account listing.
     """
-    df_domains['registrar'] = None
-    for domain in df_domains['domain']:
-        if domain in PORKBUN['PORKBUN_DOMAINS']:
-            df_domains.loc[df_domains['domain'] == domain, 'registrar'] = 'Porkbun'
-        else:
-            df_domains.loc[df_domains['domain'] == domain, 'registrar'] = 'EmailBison'
+    if domain_index is None:
+        domain_index = DomainIndex(porkbun=(d.get('domain') for d in iter_domains_cached(PORKBUN['PORKBUN_KEY'], PORKBUN['PORKBUN_SECRET'])))
+    df_domains['registrar'] = np.where(domain_index.isin('porkbun', df_domains['domain']), 'Porkbun', 'EmailBison')
+    return df_domains
 
 def main():
     """
     Main function to run the script.
     """
     if EMAILBISON["GRAB_DOMAINS"] == True:
-        df_accounts, df_domains = grab_all_domains(EMAILBISON["BISON_API_KEY"])
-        print("Domains grabbed")
-        df_domains = calculate_bison_domain_stats(df_accounts, df_domains, EMAILBISON["BISON_API_KEY"])
+        df_domains = all_workspaces_domain_stats(EMAILBISON["BISON_API_KEYS"])
         print("Bison domains calculated")
-        df_domains.to_csv('bison_domains.csv', index=False)
+        write_report(df_domains, 'bison_domains',
+                     partition_cols=['workspace_id'] if REPORTS["PARTITION_BY_WORKSPACE"] else None)
+        if EMAILBISON["KEEP_HISTORY"] == True:
+            StatsHistory().append(df_domains)
         print("Domains saved")
 
 if __name__ == "__main__":
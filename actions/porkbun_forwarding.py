@@ -1,5 +1,8 @@
-from services.porkbun_functions import add_forwarding, delete_forwarding, get_forwarding
-from utils.config import PORKBUN, DOMAINS
+from collections import Counter
+from services.porkbun_functions import add_forwarding, porkbun_retry_stats
+from services.porkbun_reconcile import apply_forwarding, desired_forward, plan_forwarding, plan_outcome, print_forwarding_plan
+from utils.concurrency import run_for_domains
+from utils.config import PORKBUN, CLOUDFLARE, DOMAINS
 
 def add_forwarding_logic(domains, new_url):
     """
@@ -9,27 +12,66 @@ def add_forwarding_logic(domains, new_url):
         for domain in domains:
             add_forwarding(domain, new_url, PORKBUN["PORKBUN_KEY"], PORKBUN["PORKBUN_SECRET"])
 
-def delete_forwarding_logic(domains):
+def delete_forwarding_logic(domains, max_workers=None):
     """
-    This is the workflow for deleting a forwarding from a domain in Porkbun.
+    This is the workflow for deleting every root forwarding from a domain in Porkbun.
     """
     if PORKBUN['DELETE_FORWARDING'] == True:
-        for domain in domains:
-            domain_data = get_forwarding(domain, PORKBUN["PORKBUN_KEY"], PORKBUN["PORKBUN_SECRET"])
-            record_id = domain_data[0].get("id")
-            delete_forwarding(domain, record_id, PORKBUN["PORKBUN_KEY"], PORKBUN["PORKBUN_SECRET"])
+        return sync_forwarding(domains, None, dry_run=False, max_workers=max_workers)
 
-def update_forwarding_logic(domains, new_url):
+def update_forwarding_logic(domains, new_url, max_workers=None):
     """
     This is the workflow for updating a forwarding for a domain in Porkbun.
+    Domains already forwarding to `new_url` with the configured settings are left untouched.
     """
-    if PORKBUN['UPDATE_FORWARDING'] == True:
-        for domain in domains:
-            domain_data = get_forwarding(domain, PORKBUN["PORKBUN_KEY"], PORKBUN["PORKBUN_SECRET"])
-            record_id = domain_data[0].get("id")
-            delete_forwarding(domain, record_id, PORKBUN["PORKBUN_KEY"], PORKBUN["PORKBUN_SECRET"])
-            add_forwarding(domain, new_url, PORKBUN["PORKBUN_KEY"], PORKBUN["PORKBUN_SECRET"])
+    if PORKBUN['CHANGE_FORWARDING'] == True:
+        return sync_forwarding(domains, desired_forward(new_url), dry_run=False, max_workers=max_workers)
+
+def reconcile_forwarding(domains, new_url=None, dry_run=None, max_workers=None):
+    """
+    This is the workflow for converging Porkbun forwards to the target URL, type, includePath and wildcard settings.
+    It always prints the plan; with DRY_RUN off it then applies only the needed deletes/adds.
+    """
+    if PORKBUN['RECONCILE_FORWARDING'] == True:
+        dry_run = PORKBUN['DRY_RUN'] if dry_run is None else dry_run
+        return sync_forwarding(domains, desired_forward(new_url or CLOUDFLARE['TARGET_URL']), dry_run, max_workers)
+
+def sync_forwarding(domains, desired, dry_run=True, max_workers=None):
+    """
+    This is the function for reading, planning and (unless `dry_run`) applying forwards for every domain,
+    in parallel under the shared Porkbun rate limit. Returns one {"domain", "outcome", "error"} per domain.
+    """
+    max_workers = max_workers or PORKBUN['MAX_WORKERS']
+
+    print("🔍 Reading current forwards...")
+    planned = run_for_domains(lambda domain: plan_forwarding(domain, desired), domains, max_workers,
+                              stats=porkbun_retry_stats)
+    plans = [r['result'] for r in planned if r['ok']]
+    print_forwarding_plan(plans)
+
+    outcomes = {r['domain']: {'domain': r['domain'], 'outcome': 'failed', 'error': r['error']}
+                for r in planned if not r['ok']}
+    for plan in plans:
+        outcome = 'planned' if dry_run and plan_outcome(plan) != 'unchanged' else 'unchanged'
+        outcomes[plan['domain']] = {'domain': plan['domain'], 'outcome': outcome, 'error': None}
+
+    if dry_run:
+        print("Dry run – nothing applied")
+    else:
+        pending = {plan['domain']: plan for plan in plans if plan_outcome(plan) != 'unchanged'}
+        if pending:
+            print("🔄 Applying changes...")
+            for r in run_for_domains(lambda domain: apply_forwarding(pending[domain]), list(pending), max_workers,
+                                     stats=porkbun_retry_stats):
+                outcomes[r['domain']] = {'domain': r['domain'], 'outcome': r['result'] if r['ok'] else 'failed',
+                                         'error': r['error']}
+
+    results = [outcomes[domain] for domain in dict.fromkeys(r['domain'] for r in planned)]
+    counts = Counter(r['outcome'] for r in results)
+    print("📊 Forwarding: " + ", ".join(f"{outcome}={n}" for outcome, n in counts.items()))
+    return results
 
 # add_forwarding_logic(DOMAINS, "https://sylnow.com/")
 # delete_forwarding_logic(DOMAINS)
-# update_forwarding_logic(DOMAINS, "https://sylnow.com/")
\ No newline at end of file
+# update_forwarding_logic(DOMAINS, "https://sylnow.com/")
+# reconcile_forwarding(DOMAINS)
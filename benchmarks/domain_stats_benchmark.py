@@ -0,0 +1,101 @@
+import sys
+import time
+import numpy as np
+import pandas as pd
+from services.bison_domains import drop_duplicate_domains
+from services.bison_stats import domain_stats
+
+"""
+Benchmark of the per-metric domain stats functions against the single-pass engine.
+
+    python -m benchmarks.domain_stats_benchmark [accounts ...]
+
+Defaults to 100k and 1M synthetic accounts spread over one domain per 20 accounts.
+The per-metric side is a frozen copy of the original helpers (set.intersection tags,
+per-row ESP apply, one groupby per metric), so later changes to services/bison_domains.py
+do not move the baseline.
+"""
+
+TYPES = ["google_oauth", "microsoft_oauth", "smtp"]
+TAG_SETS = [(), ("warm",), ("warm", "client-a"), ("client-a", "client-b"), ("warm", "client-b", "reserve")]
+
+def synthetic_accounts(n, accounts_per_domain=20, seed=0):
+    """Build a compact accounts frame shaped like get_bison_accounts_df output."""
+    rng = np.random.default_rng(seed)
+    domains = [f"domain{i}.com" for i in range(max(1, n // accounts_per_domain))]
+    domain_codes = rng.integers(0, len(domains), n)
+    return pd.DataFrame({
+        "email": [f"user{i}@{domains[c]}" for i, c in enumerate(domain_codes)],
+        "domain": pd.Categorical.from_codes(domain_codes, categories=domains),
+        "type": pd.Categorical.from_codes(rng.integers(0, len(TYPES), n), categories=TYPES),
+        "tags": [TAG_SETS[i] for i in rng.integers(0, len(TAG_SETS), n)],
+        "unique_replied_count": rng.integers(0, 10, n).astype("uint8"),
+        "total_leads_contacted_count": rng.integers(0, 500, n).astype("uint16"),
+    })
+
+# ---------------------- Legacy per-metric helpers (frozen) ---------------------
+
+def extract_tag_names(tag_list):
+    if not isinstance(tag_list, (list, tuple)):
+        return set()
+    if isinstance(tag_list, tuple):
+        return set(tag_list)
+    return set(tag['name'] for tag in tag_list if 'name' in tag)
+
+def get_domain_tags(df_accounts, df_domains):
+    df_domains = drop_duplicate_domains(df_domains)
+    df_accounts['tag_names'] = df_accounts['tags'].apply(extract_tag_names)
+    common_tags = df_accounts.groupby('domain', observed=True)['tag_names'].apply(
+        lambda tag_sets: list(set.intersection(*tag_sets)) if tag_sets.any() else []
+    )
+    df_domains.loc[:, 'tags'] = df_domains['domain'].map(common_tags)
+    return df_domains
+
+def add_account_count(accounts_df, domains_df):
+    account_counts = accounts_df.groupby('domain', observed=True).size().reset_index(name='accounts')
+    return domains_df.merge(account_counts, on='domain', how='left')
+
+def grabbing_ESP(df_accounts, df_domains):
+    df_accounts['type'] = df_accounts['type'].apply(
+        lambda x: 'Outlook' if x == 'microsoft_oauth'
+        else 'Google' if x == 'google_oauth'
+        else 'Other'
+    )
+    esp_by_domain = df_accounts.groupby('domain', observed=True)['type'].unique().reset_index()
+    esp_by_domain['ESP'] = esp_by_domain['type'].apply(lambda x: ', '.join(x))
+    return df_domains.merge(esp_by_domain[['domain', 'ESP']], on='domain', how='left')
+
+def calculating_reply_rate(df_accounts, df_domains):
+    replied_sum = df_accounts.groupby('domain', observed=True)['unique_replied_count'].sum()
+    total_sum = df_accounts.groupby('domain', observed=True)['total_leads_contacted_count'].sum()
+    reply_rate = (replied_sum / total_sum).fillna(0)
+    return df_domains.merge(reply_rate.reset_index(name='reply_rate'), on='domain', how='left')
+
+# ---------------------- Benchmark -----------------------------------------------
+
+def per_metric(df_accounts, df_domains):
+    df_domains = get_domain_tags(df_accounts, df_domains)
+    df_domains = add_account_count(df_accounts, df_domains)
+    df_domains = grabbing_ESP(df_accounts, df_domains)
+    return calculating_reply_rate(df_accounts, df_domains)
+
+def single_pass(df_accounts, df_domains):
+    stats = domain_stats(df_accounts)
+    return drop_duplicate_domains(df_domains).join(stats, on="domain").reset_index(drop=True)
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+def run(n):
+    df_accounts = synthetic_accounts(n)
+    df_domains = pd.DataFrame({"domain": df_accounts["domain"].cat.categories})
+    # per_metric mutates the accounts frame, so it gets its own copy.
+    old = timed(per_metric, df_accounts.copy(), df_domains.copy())
+    new = timed(single_pass, df_accounts, df_domains)
+    print(f"{n:>9,} accounts  per-metric {old:7.2f}s  single-pass {new:7.2f}s  speedup {old / new:5.1f}x")
+
+if __name__ == "__main__":
+    for n in [int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000]:
+        run(n)
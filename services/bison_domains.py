@@ -1,30 +1,147 @@
 import os
 from dotenv import load_dotenv
-import requests
 from utils.config import EMAILBISON
+from utils.transport import get_session
+from utils.retry import RetryPolicy
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from services.tag_index import TagIndex
 import pandas as pd
 
 load_dotenv()
 
 BISON_API_KEY = os.getenv("BISON_KEY")
+SENDER_EMAILS_URL = "https://mail.scaleyourleads.com/api/sender-emails"
+
+bison_retry = RetryPolicy("EmailBison", EMAILBISON["MAX_RETRIES"])
+
+def bison_session():
+    """
+    This is the pooled EmailBison session shared by every workspace.
+    """
+    return get_session("bison", retry=bison_retry)
+
+@lru_cache(maxsize=None)
+def bison_headers(api_key):
+    """
+    This is the auth header for a workspace, built once per API key.
+    """
+    return {"Authorization": f"Bearer {api_key}"}
 
 # ---------------------- API Calls--------------------------------------
 
-def get_bison_accounts(api_key, page=1):
+def get_bison_page(api_key, page=1):
     """
-    This is the API call for grabbing all accounts from a Bison workspace.
+    This is the API call for one page of sender emails, raising instead of returning an empty page.
+    Returns the page body (with `data`, `links` and `meta`).
     """
-    try:
-        url = f"https://mail.scaleyourleads.com/api/sender-emails?page={page}"
-        headers = {
-            "Authorization": f"Bearer {api_key}"
-        }
-        response = requests.get(url, headers=headers)
-        data = response.json()
-        return data['data'], data['links']['next']
-    except Exception as e:
-        print(f"Error with getting bison accounts: {e}")
-        return [], None
+    response = bison_session().get(SENDER_EMAILS_URL, params={"page": page}, headers=bison_headers(api_key))
+    response.raise_for_status()
+    data = response.json()
+    if 'data' not in data:
+        raise RuntimeError(f"EmailBison page {page} has no data: {data.get('message')}")
+    return data
+
+def _fetch_pages(api_key, pages, max_workers, transform):
+    """
+    This is the function for fetching `pages` concurrently, yielding (page, transform(accounts), error) as each one finishes.
+    """
+    def fetch(page):
+        return transform(get_bison_page(api_key, page)['data'])
+    with ThreadPoolExecutor(max_workers) as executor:
+        futures = {executor.submit(fetch, page): page for page in pages}
+        for future in as_completed(futures):
+            error = future.exception()
+            yield futures[future], None if error else future.result(), error
+
+def get_bison_pages(api_key, max_workers=None, transform=list, on_page=None):
+    """
+    This is the function for grabbing every page of sender emails in a workspace.
+    The first page tells us `meta.last_page`; the rest are fetched concurrently with at most
+    `max_workers` in flight, and any page that fails is refetched on its own.
+    `transform(accounts)` runs on each page as it arrives, so only its result is kept.
+    Returns the transformed pages in page order, or, with `on_page`, hands each one to
+    `on_page(result)` in page order as soon as the pages before it are in and keeps nothing.
+    """
+    max_workers = max_workers or EMAILBISON["MAX_WORKERS"]
+    done = []
+    emit = on_page or done.append
+    first = get_bison_page(api_key, 1)
+    last_page = (first.get('meta') or {}).get('last_page')
+    if last_page is None:
+        # No page count to fan out over, so follow the `next` links instead.
+        page, next_page = 1, first['links']['next']
+        emit(transform(first['data']))
+        while next_page:
+            page += 1
+            data = get_bison_page(api_key, page)
+            emit(transform(data['data']))
+            next_page = data['links']['next']
+        return done
+
+    emit(transform(first['data']))
+    # Pages that finished early wait here until every page before them has been emitted.
+    waiting, next_page = {}, 2
+    remaining = list(range(2, last_page + 1))
+    for attempt in range(EMAILBISON["PAGE_RETRIES"] + 1):
+        if not remaining:
+            break
+        if attempt:
+            print(f"⏳ EmailBison: refetching {len(remaining)} failed page(s)")
+        failed = {}
+        for page, result, error in _fetch_pages(api_key, remaining, max_workers, transform):
+            if error:
+                failed[page] = error
+                continue
+            waiting[page] = result
+            while next_page in waiting:
+                emit(waiting.pop(next_page))
+                next_page += 1
+        remaining = sorted(failed)
+    if remaining:
+        raise RuntimeError(f"EmailBison pages {remaining} failed: {failed[remaining[0]]}")
+
+    print(f"{last_page} page(s) of sender emails fetched")
+    return done
+
+# Only these fields feed the domain stats; everything else is dropped as each page arrives.
+ACCOUNT_FIELDS = ("email", "type", "tags", "unique_replied_count", "total_leads_contacted_count")
+COUNT_FIELDS = ("unique_replied_count", "total_leads_contacted_count")
+
+def project_accounts(accounts):
+    """
+    This is the function for keeping only ACCOUNT_FIELDS from a page of accounts, as column lists.
+    Tags are reduced to their names.
+    """
+    columns = {field: [account.get(field) for account in accounts] for field in ACCOUNT_FIELDS}
+    columns["tags"] = [tuple(tag['name'] for tag in tags if 'name' in tag) if isinstance(tags, list) else ()
+                       for tags in columns["tags"]]
+    return columns
+
+def compact_accounts_df(pages):
+    """
+    This is the function for building the accounts dataframe from projected pages.
+    `domain` and `type` are categoricals and the counts use the narrowest unsigned integer type that fits.
+    """
+    columns = {field: [value for page in pages for value in page[field]] for field in ACCOUNT_FIELDS}
+    domains = [email.split('@')[1].lower() if isinstance(email, str) and '@' in email else None
+               for email in columns["email"]]
+    df = pd.DataFrame({
+        "email": columns["email"],
+        # Categories in first-seen order so the domain list keeps account order.
+        "domain": pd.Categorical(domains, categories=pd.unique(pd.Series([d for d in domains if d is not None], dtype=object))),
+        "type": pd.Categorical(columns["type"]),
+        "tags": columns["tags"],
+    })
+    for field in COUNT_FIELDS:
+        df[field] = pd.to_numeric(pd.Series(columns[field]).fillna(0), downcast="unsigned")
+    return df
+
+def get_bison_accounts_df(api_key, max_workers=None):
+    """
+    This is the function for grabbing every sender email in a workspace straight into a compact dataframe.
+    """
+    return compact_accounts_df(get_bison_pages(api_key, max_workers, transform=project_accounts))
 
 def workspace_details(api_key):
     """
@@ -32,10 +149,7 @@ def workspace_details(api_key):
     """
     try:
         url = f"https://mail.scaleyourleads.com/api/users"
-        headers = {
-            "Authorization": f"Bearer {api_key}"
-        }
-        response = requests.get(url, headers=headers)
+        response = bison_session().get(url, headers=bison_headers(api_key))
         data = response.json()
         return data.get('data', {})
     except Exception as e:
@@ -74,8 +188,10 @@ def extract_tag_names(tag_list):
     """
     This is the function for extracting the tag names from the tags dataframe.
     """
-    if not isinstance(tag_list, list):
+    if not isinstance(tag_list, (list, tuple)):
         return set()
+    if isinstance(tag_list, tuple):
+        return set(tag_list)
     return set(tag['name'] for tag in tag_list if 'name' in tag)
 
 def drop_duplicate_domains(df_domains):
@@ -91,19 +207,15 @@ def drop_duplicate_domains(df_domains):
 
 def get_domain_tags(df_accounts, df_domains):
     """
-    This is the function for getting the domains' tags from the accounts dataframe.
+    This is the function for getting the domains' tags (the tags every account of the domain has) from the accounts dataframe.
     """
     try:
         df_domains = drop_duplicate_domains(df_domains)
-        
-        df_accounts['tag_names'] = df_accounts['tags'].apply(extract_tag_names)
-        
-        common_tags = df_accounts.groupby('domain')['tag_names'].apply(
-            lambda tag_sets: list(set.intersection(*tag_sets)) if tag_sets.any() else []
-        )
-    
+        tag_index = TagIndex.from_accounts(df_accounts)
+        common_tags = pd.Series(tag_index.domain_tags(), index=tag_index.domains)
+
         df_domains.loc[:, 'tags'] = df_domains['domain'].map(common_tags)
-        
+
         return df_domains
     except Exception as e:
         print(f"Error with getting domain tags: {e}")
@@ -114,7 +226,7 @@ def add_account_count(accounts_df, domains_df):
     This is the function for counting all of the accounts associated with each domain from a dataframe.
     """
     try:
-        account_counts = accounts_df.groupby('domain').size().reset_index(name='accounts')
+        account_counts = accounts_df.groupby('domain', observed=True).size().reset_index(name='accounts')
         domains_df = domains_df.merge(account_counts, on='domain', how='left')
         
         return domains_df
@@ -134,7 +246,7 @@ def grabbing_ESP(df_accounts, df_domains):
         )
         
         # Group by domain and get unique types for each domain
-        esp_by_domain = df_accounts.groupby('domain')['type'].unique().reset_index()
+        esp_by_domain = df_accounts.groupby('domain', observed=True)['type'].unique().reset_index()
         esp_by_domain['ESP'] = esp_by_domain['type'].apply(lambda x: ', '.join(x))
         
         # Merge with domains_df
@@ -154,8 +266,8 @@ def calculating_reply_rate(df_accounts, df_domains):
     This is the function for calculating the reply rate of each domain.
     """
     try:
-        replied_sum = df_accounts.groupby('domain')['unique_replied_count'].sum()
-        total_sum = df_accounts.groupby('domain')['total_leads_contacted_count'].sum()
+        replied_sum = df_accounts.groupby('domain', observed=True)['unique_replied_count'].sum()
+        total_sum = df_accounts.groupby('domain', observed=True)['total_leads_contacted_count'].sum()
         
         reply_rate = replied_sum / total_sum
         reply_rate = reply_rate.fillna(0)
@@ -0,0 +1,65 @@
+import hashlib
+import os
+import pandas as pd
+from utils.config import EMAILBISON
+from services.bison_domains import ACCOUNT_FIELDS
+
+"""
+Local snapshot of a Bison workspace: the compact accounts frame from the
+last sync and the domain stats computed from it. Comparing a fresh pull
+with the snapshot tells us which domains actually need their stats redone.
+"""
+
+SNAPSHOT_COLUMNS = ["email", "domain", "type", "tags", "unique_replied_count", "total_leads_contacted_count"]
+
+class BisonSnapshot:
+    """
+    The accounts and domain tables of one workspace, stored as pickles under `directory`.
+    Files are named after a hash of the API key so keys never end up on disk.
+    """
+    def __init__(self, api_key, directory=None):
+        directory = directory or EMAILBISON["SNAPSHOT_DIR"]
+        key = hashlib.sha256((api_key or "").encode()).hexdigest()[:16]
+        self.accounts_path = os.path.join(directory, f"{key}_accounts.pkl")
+        self.domains_path = os.path.join(directory, f"{key}_domains.pkl")
+
+    def exists(self):
+        return os.path.exists(self.accounts_path) and os.path.exists(self.domains_path)
+
+    def load(self):
+        """Return (df_accounts, df_domains) from the last sync, or (None, None) if there is none."""
+        if not self.exists():
+            return None, None
+        try:
+            return pd.read_pickle(self.accounts_path), pd.read_pickle(self.domains_path)
+        except Exception as e:
+            print(f"Ignoring unreadable Bison snapshot: {e}")
+            return None, None
+
+    def save(self, df_accounts, df_domains):
+        os.makedirs(os.path.dirname(self.accounts_path) or ".", exist_ok=True)
+        for df, path in ((df_accounts[SNAPSHOT_COLUMNS], self.accounts_path), (df_domains, self.domains_path)):
+            tmp = path + ".tmp"
+            df.to_pickle(tmp)
+            os.replace(tmp, path)
+
+def _signatures(df_accounts):
+    """Map each email to a comparable tuple of its projected fields (and its domain)."""
+    columns = [df_accounts[field].astype(object) for field in ["domain", *ACCOUNT_FIELDS] if field != "email"]
+    return dict(zip(df_accounts["email"], zip(*columns)))
+
+def diff_accounts(old, new):
+    """
+    Compare two accounts frames by email.
+
+    Returns:
+        dict: {"added", "removed", "changed": [email, ...], "domains": set of domains to recompute}
+    """
+    before, after = _signatures(old), _signatures(new)
+    added = [email for email in after if email not in before]
+    removed = [email for email in before if email not in after]
+    changed = [email for email in after if email in before and before[email] != after[email]]
+    domains = {after[email][0] for email in added + changed}
+    domains |= {before[email][0] for email in removed + changed}
+    domains.discard(None)
+    return {"added": added, "removed": removed, "changed": changed, "domains": domains}
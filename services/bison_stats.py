@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+from services.tag_index import TagIndex, _as_names
+
+"""
+Vectorized per-domain stats for a Bison accounts frame.
+
+domain_stats() computes account count, ESP list and reply rate in one
+groupby().agg pass over the accounts, and common tags as the bitwise AND of
+account tag bitmaps (see services/tag_index.py). Each ESP becomes a first-seen
+row position (min over the domain), so nothing runs per account in Python and
+the caller's frame is never modified.
+"""
+
+ESP_LABELS = ("Outlook", "Google", "Other")
+
+def _esp_codes(types):
+    """Map Bison account types to indexes into ESP_LABELS."""
+    return np.select([types == "microsoft_oauth", types == "google_oauth"], [0, 1], 2)
+
+def _join_esps(first_seen):
+    """Join the ESPs each domain uses, in the order they first appear, e.g. "Google, Outlook"."""
+    order = np.argsort(np.where(np.isnan(first_seen), np.inf, first_seen), axis=1)
+    present = ~np.isnan(np.take_along_axis(first_seen, order, axis=1))
+    labels = np.array(ESP_LABELS, dtype=object)[order]
+    joined = np.where(present[:, 0], labels[:, 0], "")
+    for k in range(1, len(ESP_LABELS)):
+        joined = np.where(present[:, k], joined + ", " + labels[:, k], joined)
+    return joined
+
+def domain_stats(df_accounts: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compute per-domain stats in a single groupby().agg pass.
+
+    Returns:
+        DataFrame indexed by domain (first-seen order) with columns
+        tags (tags every account has), accounts, ESP and reply_rate.
+    """
+    rows = np.arange(len(df_accounts), dtype=float)
+    esp = _esp_codes(df_accounts["type"].to_numpy())
+    tag_index = TagIndex.from_accounts(df_accounts)
+
+    columns = {
+        "replied": df_accounts["unique_replied_count"].to_numpy(),
+        "contacted": df_accounts["total_leads_contacted_count"].to_numpy(),
+    }
+    for i in range(len(ESP_LABELS)):
+        columns[f"esp_{i}"] = np.where(esp == i, rows, np.nan)
+    frame = pd.DataFrame(columns, index=df_accounts.index)
+
+    spec = {
+        "accounts": ("replied", "size"),
+        "replied": ("replied", "sum"),
+        "contacted": ("contacted", "sum"),
+        **{f"esp_{i}": (f"esp_{i}", "min") for i in range(len(ESP_LABELS))},
+    }
+    grouped = frame.groupby(df_accounts["domain"], observed=True, sort=False).agg(**spec)
+
+    domains = grouped.index.astype(object)
+    stats = pd.DataFrame({
+        "tags": tag_index.domain_tags(domains),
+        "accounts": grouped["accounts"].to_numpy(),
+        "ESP": _join_esps(grouped[[f"esp_{i}" for i in range(len(ESP_LABELS))]].to_numpy()),
+        "reply_rate": (grouped["replied"] / grouped["contacted"]).fillna(0).to_numpy(),
+    }, index=pd.Index(domains, name="domain"))
+    return stats
+
+ESP_BY_TYPE = {"microsoft_oauth": ESP_LABELS[0], "google_oauth": ESP_LABELS[1]}
+
+class DomainStatsAggregator:
+    """
+    Running per-domain stats, updated one page of raw accounts at a time.
+    Holds one small record per domain (never the accounts), so memory grows with
+    the number of domains. Pages must be added in page order for ESP order and
+    domain order to match domain_stats().
+    """
+    def __init__(self):
+        # domain -> [accounts, replied, contacted, ESPs in first-seen order, common tag set]
+        self.domains = {}
+
+    def add_page(self, accounts):
+        for account in accounts:
+            email = account.get("email")
+            if not isinstance(email, str) or "@" not in email:
+                continue
+            domain = email.split("@")[1].lower()
+            tags = set(_as_names(account.get("tags")))
+            state = self.domains.get(domain)
+            if state is None:
+                state = self.domains[domain] = [0, 0, 0, [], tags]
+            else:
+                state[4] &= tags
+            state[0] += 1
+            state[1] += account.get("unique_replied_count") or 0
+            state[2] += account.get("total_leads_contacted_count") or 0
+            esp = ESP_BY_TYPE.get(account.get("type"), ESP_LABELS[2])
+            if esp not in state[3]:
+                state[3].append(esp)
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Return the same columns as domain_stats(), indexed by domain in first-seen order.
+        """
+        rows = []
+        for domain, (accounts, replied, contacted, esps, tags) in self.domains.items():
+            if contacted:
+                reply_rate = replied / contacted
+            else:
+                reply_rate = np.inf if replied else 0.0
+            rows.append((domain, sorted(tags), accounts, ", ".join(esps), reply_rate))
+        return pd.DataFrame(rows, columns=["domain", "tags", "accounts", "ESP", "reply_rate"]).set_index("domain")
@@ -0,0 +1,364 @@
+import asyncio
+import threading
+import aiohttp
+from utils.config import CLOUDFLARE, TRANSPORT
+from utils.rate_limit import AsyncRateLimiter
+from utils.concurrency import print_summary
+from services.cloudflare_functions import BASE, DNS_BATCH_OPS, DNS_SINGLE_METHODS, _batch_entry, _sync_batch_snapshot, cf_limiter, cf_retry, cf_retry_stats, get_headers
+from services.cloudflare_functions import page_rule_payload, print_batch_report, raise_for_batch_report, select_page_rules, zone_snapshot
+from services.cloudflare_zone_index import zone_index
+
+"""
+Async version of cloudflare_functions. One AsyncCloudflare client keeps hundreds of
+requests in flight on a single thread. SyncCloudflare and run_async_for_domains let
+the sync action modules call into it.
+
+    async def add_a_record(client, domain):
+        zone_id = await client.get_zone_id(domain)
+        if not await client.a_record_exists(zone_id, domain):
+            await client.create_a_record(zone_id, domain, CLOUDFLARE['IP'])
+
+    results = run_async_for_domains(add_a_record, DOMAINS)
+"""
+
+class AsyncAPIError(Exception):
+    def __init__(self, status: int, text: str):
+        super().__init__(f"API error {status}: {text}")
+        self.status = status
+        self.text = text
+
+class AsyncCloudflare:
+    """
+    Async Cloudflare client with the same semantics as cloudflare_functions.
+    Shares the zone index, zone snapshots and rate-limit window with the sync functions.
+    """
+    def __init__(self, max_in_flight: int = None, limiter: AsyncRateLimiter = None):
+        self.max_in_flight = max_in_flight or CLOUDFLARE["ASYNC_MAX_IN_FLIGHT"]
+        # Same window as the sync session, so both paths together stay under Cloudflare's limit.
+        self._limiter = limiter or AsyncRateLimiter(cf_limiter)
+        self._session = None
+        self._account_id = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def open(self):
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                headers=get_headers(CLOUDFLARE['CF_API_TOKEN']),
+                connector=aiohttp.TCPConnector(limit=self.max_in_flight),
+                timeout=aiohttp.ClientTimeout(sock_connect=TRANSPORT["CONNECT_TIMEOUT"],
+                                              sock_read=TRANSPORT["READ_TIMEOUT"]),
+            )
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def request(self, method: str, path: str, **kw) -> dict:
+        """
+        Send one request and return the full JSON body. Retries with the same
+        policy (and counters) as the sync session; raises AsyncAPIError on failure.
+        """
+        attempt = 0
+        while True:
+            await self._limiter.acquire()
+            cf_retry.record("requests")
+            try:
+                async with self._session.request(method, f"{BASE}{path}", **kw) as r:
+                    if r.status < 400 or not cf_retry.should_retry(method, attempt, status=r.status):
+                        data = await r.json() if r.content_type == "application/json" else {}
+                        if r.status >= 400 or not data.get("success", False):
+                            raise AsyncAPIError(r.status, await r.text())
+                        return data
+                    wait = cf_retry.delay(attempt, r.headers.get("Retry-After"))
+                    print(f"⏳ Cloudflare: HTTP {r.status} – retry {attempt + 1}/{cf_retry.max_retries} in {wait:.1f}s")
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if not cf_retry.should_retry(method, attempt, error=e):
+                    raise
+                wait = cf_retry.delay(attempt)
+                print(f"⏳ Cloudflare: {type(e).__name__} – retry {attempt + 1}/{cf_retry.max_retries} in {wait:.1f}s")
+            await asyncio.sleep(wait)
+            attempt += 1
+
+    async def api(self, method: str, path: str, **kw):
+        return (await self.request(method, path, **kw))["result"]
+
+    # ─── Account & Zones ────────────────────────────────────────────────── #
+    async def first_account_id(self) -> str:
+        """Return the first account the token has access to."""
+        if self._account_id is None:
+            result = await self.api("GET", "/accounts")
+            if not result or not isinstance(result, list):
+                raise RuntimeError("Could not retrieve account ID – check credentials: No accounts found in API response")
+            self._account_id = result[0]["id"]
+        return self._account_id
+
+    async def check_zone_exists(self, domain: str, use_index: bool = True) -> tuple[bool, dict]:
+        if CLOUDFLARE["USE_ZONE_INDEX"] and use_index:
+            zone_data = zone_index.get(domain)
+            if zone_data:
+                return True, zone_data
+            if zone_index.is_complete():
+                return False, None
+
+        result_list = await self.api("GET", "/zones", params={"name": domain})
+        if result_list and isinstance(result_list, list):
+            zone_index.put(result_list[0])
+            return True, result_list[0]
+        return False, None
+
+    async def get_zone_id(self, domain: str) -> str:
+        exists, zone_data = await self.check_zone_exists(domain)
+        if exists:
+            return zone_data["id"]
+        raise Exception(f"Zone ID not found for {domain}")
+
+    async def create_new_zone(self, account_id: str, domain: str) -> dict:
+        payload = {"name": domain, "account": {"id": account_id}, "type": "full"}
+        result = await self.api("POST", "/zones", json=payload)
+        if not result or "name_servers" not in result:
+            raise RuntimeError(f"Zone creation for '{domain}' did not return nameservers")
+        zone_index.put(result)
+        return result
+
+    async def create_zone(self, account_id: str, domain: str) -> tuple[str, str]:
+        """Create the zone or, if it already exists, return its current nameservers."""
+        exists, result = await self.check_zone_exists(domain)
+        if not exists:
+            try:
+                result = await self.create_new_zone(account_id, domain)
+            except AsyncAPIError as e:
+                if e.status not in [409, 400]:
+                    raise
+                exists, result = await self.check_zone_exists(domain, use_index=False)
+                if not exists:
+                    raise RuntimeError(f"Zone '{domain}' exists but could not retrieve its details")
+
+        name_servers = result.get("name_servers")
+        if not name_servers or not isinstance(name_servers, list) or len(name_servers) < 2:
+            raise RuntimeError(f"Could not retrieve nameservers for '{domain}'")
+        return name_servers[0], name_servers[1]
+
+    async def snapshot(self, zone_id: str, dns_records: bool = True, page_rules: bool = False):
+        """Return the shared ZoneSnapshot, fetching the requested parts without blocking the loop."""
+        snapshot = zone_snapshot(zone_id)
+        if dns_records and not snapshot.has_dns_records:
+            snapshot.load(dns_records=await self.api("GET", f"/zones/{zone_id}/dns_records",
+                                                     params={"per_page": 5000}))
+        if page_rules and not snapshot.has_page_rules:
+            snapshot.load(page_rules=await self.api("GET", f"/zones/{zone_id}/pagerules"))
+        return snapshot
+
+    # ─── A Records ──────────────────────────────────────────────────────── #
+    async def get_a_records(self, zone_id: str, zone_name: str) -> list:
+        return (await self.snapshot(zone_id)).a_records(zone_name)
+
+    async def a_record_exists(self, zone_id: str, domain: str, ip: str = None) -> bool:
+        return any(ip is None or r["content"] == ip for r in await self.get_a_records(zone_id, domain))
+
+    async def create_a_record(self, zone_id: str, domain: str, ip: str, proxied: bool = True) -> dict:
+        data = {"type": "A", "name": domain, "content": ip, "ttl": 600, "proxied": proxied}
+        record = await self.api("POST", f"/zones/{zone_id}/dns_records", json=data)
+        zone_snapshot(zone_id).put_dns_record(record)
+        return record
+
+    async def batch_dns_records(self, zone_id: str, posts: list = None, puts: list = None,
+                                patches: list = None, deletes: list = None, fallback: bool = True) -> list:
+        """Same as cloudflare_functions.batch_dns_records: one /dns_records/batch call, one-by-one fallback."""
+        ops = {
+            "posts": list(posts or []),
+            "puts": list(puts or []),
+            "patches": list(patches or []),
+            "deletes": [d if isinstance(d, dict) else {"id": d} for d in deletes or []],
+        }
+        body = {op: ops[op] for op in DNS_BATCH_OPS if ops[op]}
+        if not body:
+            return []
+
+        try:
+            result = await self.api("POST", f"/zones/{zone_id}/dns_records/batch", json=body) or {}
+            report = []
+            for op in DNS_BATCH_OPS:
+                returned = result.get(op) or []
+                for i, sent in enumerate(ops[op]):
+                    report.append(_batch_entry(op, sent, True, record=returned[i] if i < len(returned) else sent))
+        except AsyncAPIError as e:
+            if not fallback:
+                report = [_batch_entry(op, sent, False, error=str(e)) for op in DNS_BATCH_OPS for sent in ops[op]]
+            else:
+                print(f"[{zone_id}] DNS batch rejected ({e}) – retrying records one by one")
+                report = []
+                for op in DNS_BATCH_OPS:
+                    for sent in ops[op]:
+                        path = f"/zones/{zone_id}/dns_records"
+                        payload = sent
+                        if op != "posts":
+                            path = f"{path}/{sent['id']}"
+                            payload = None if op == "deletes" else {k: v for k, v in sent.items() if k != "id"}
+                        try:
+                            record = await self.api(DNS_SINGLE_METHODS[op], path, json=payload)
+                            report.append(_batch_entry(op, sent, True, record=record or sent))
+                        except AsyncAPIError as single_error:
+                            report.append(_batch_entry(op, sent, False, error=str(single_error)))
+
+        _sync_batch_snapshot(zone_id, report)
+        return report
+
+    async def update_a_record(self, zone_id: str, zone_name: str, new_ip: str, proxied: bool = True):
+        records = await self.get_a_records(zone_id, zone_name)
+        if not records:
+            print(f"[{zone_name}] No A record to update (nothing changed)")
+            return
+
+        records = [r for r in records if r["content"] != new_ip or r.get("proxied") != proxied]
+        if not records:
+            print(f"[{zone_name}] A record already ➔ {new_ip} (proxied={proxied}) – nothing changed")
+            return
+
+        if len(records) > 1:
+            puts = [{"id": r["id"], "type": "A", "name": r["name"], "content": new_ip, "ttl": 600, "proxied": proxied}
+                    for r in records]
+            report = await self.batch_dns_records(zone_id, puts=puts)
+            print_batch_report(zone_name, report)
+            raise_for_batch_report(zone_name, report)
+            return report
+
+        for r in records:
+            payload = {"type": "A", "name": r["name"], "content": new_ip, "ttl": 600, "proxied": proxied}
+            record = await self.api("PUT", f"/zones/{zone_id}/dns_records/{r['id']}", json=payload)
+            zone_snapshot(zone_id).put_dns_record(record)
+            print(f"[{zone_name}] A record {r['id']} ➔ {new_ip} (proxied={proxied})")
+
+    async def delete_a_record(self, zone_id: str, zone_name: str):
+        records = await self.get_a_records(zone_id, zone_name)
+        if not records:
+            print(f"[{zone_name}] A record does not exist – OK")
+            return
+
+        if len(records) > 1:
+            report = await self.batch_dns_records(zone_id, deletes=[r["id"] for r in records])
+            print_batch_report(zone_name, report)
+            raise_for_batch_report(zone_name, report)
+            return report
+
+        for r in records:
+            await self.api("DELETE", f"/zones/{zone_id}/dns_records/{r['id']}")
+            zone_snapshot(zone_id).remove_dns_record(r["id"])
+            print(f"[{zone_name}] Deleted A record {r['id']}")
+
+    # ─── Page Rules ─────────────────────────────────────────────────────── #
+    async def find_redirect_rules(self, zone_id: str, domain: str) -> list:
+        return (await self.snapshot(zone_id, dns_records=False, page_rules=True)).redirect_rules(domain)
+
+    async def create_page_rule(self, zone_id: str, domain: str):
+        if await self.find_redirect_rules(zone_id, domain):
+            print(f"[{domain}] page rule already exists – skipping")
+            return
+        rule = await self.api("POST", f"/zones/{zone_id}/pagerules", json=page_rule_payload(domain))
+        zone_snapshot(zone_id).put_page_rule(rule)
+        print(f"[{domain}] 301 page rule created")
+
+    async def _select_rules(self, zone_id: str, domain: str, select: str, old_url: str, verb: str) -> list:
+        if select == "prompt":
+            raise ValueError("The async client cannot prompt – use 'all', 'highest_priority' or 'match_url'")
+        return select_page_rules(await self.find_redirect_rules(zone_id, domain), select, old_url, verb)
+
+    async def update_page_rule(self, zone_id: str, domain: str, new_url: str, status_code: int = 301,
+                               select: str = "all", old_url: str = None):
+        """
+        Change the forwarding destination of the matching Page Rules chosen
+        by `select` (see select_page_rules). Rules already at new_url are skipped.
+        """
+        rules = await self._select_rules(zone_id, domain, select, old_url, "update")
+        rules = [r for r in rules
+                 if (r["actions"][0]["value"].get("url"), r["actions"][0]["value"].get("status_code")) != (new_url, status_code)]
+        if not rules:
+            print(f"[{domain}] No Page Rule to update – nothing changed")
+            return
+        for selected_rule in rules:
+            payload = {
+                "targets": selected_rule["targets"],
+                "actions": [{"id": "forwarding_url", "value": {"url": new_url, "status_code": status_code}}],
+                "status": selected_rule["status"],
+                "priority": selected_rule["priority"],
+            }
+            rule = await self.api("PUT", f"/zones/{zone_id}/pagerules/{selected_rule['id']}", json=payload)
+            zone_snapshot(zone_id).put_page_rule(rule)
+            print(f"[{domain}] Updated Page Rule {selected_rule['id']}")
+
+    async def delete_page_rule(self, zone_id: str, domain: str, select: str = "all", old_url: str = None):
+        """Remove the matching Page Rules chosen by `select` (see select_page_rules)."""
+        rules = await self._select_rules(zone_id, domain, select, old_url, "delete")
+        if not rules:
+            print(f"[{domain}] Page Rule does not exist – OK")
+            return
+        for r in rules:
+            await self.api("DELETE", f"/zones/{zone_id}/pagerules/{r['id']}")
+            zone_snapshot(zone_id).remove_page_rule(r["id"])
+            print(f"[{domain}] Deleted Page Rule {r['id']}")
+
+# ─── Batch helpers & sync adapter ───────────────────────────────────────── #
+async def _run_one(task, client, domain):
+    try:
+        return {"domain": domain, "ok": True, "result": await task(client, domain), "error": None}
+    except Exception as e:
+        return {"domain": domain, "ok": False, "result": None, "error": e}
+
+async def gather_for_domains(task, domains, client: AsyncCloudflare) -> list:
+    """Run `await task(client, domain)` for every domain at once; results in input order."""
+    results = await asyncio.gather(*(_run_one(task, client, domain) for domain in domains))
+    print_summary(results, cf_retry_stats())
+    return list(results)
+
+def run_async_for_domains(task, domains, max_in_flight: int = None) -> list:
+    """
+    Sync entry point for the action modules: same result shape as
+    utils.concurrency.run_for_domains, but `task` is `async def task(client, domain)`.
+    """
+    async def main():
+        async with AsyncCloudflare(max_in_flight) as client:
+            return await gather_for_domains(task, list(domains), client)
+    return asyncio.run(main())
+
+class SyncCloudflare:
+    """
+    Blocking facade over AsyncCloudflare. The client lives on a background event
+    loop, so sync code can call `cf.get_zone_id(domain)` one at a time or
+    `cf.map(task, domains)` for a concurrent batch.
+    """
+    def __init__(self, max_in_flight: int = None):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        self._client = AsyncCloudflare(max_in_flight)
+        self._run(self._client.open())
+
+    def _run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if asyncio.iscoroutinefunction(attr):
+            return lambda *args, **kw: self._run(attr(*args, **kw))
+        return attr
+
+    def map(self, task, domains) -> list:
+        return self._run(gather_for_domains(task, list(domains), self._client))
+
+    def close(self):
+        self._run(self._client.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
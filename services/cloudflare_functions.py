@@ -1,34 +1,63 @@
 import requests
-import sys
 import time
 import os
+import threading
 from utils.config import CLOUDFLARE
+from utils.transport import get_session
+from utils.rate_limit import RateLimiter
+from utils.retry import RetryPolicy
+from services.cloudflare_zone_index import zone_index
 from dotenv import load_dotenv
 
 load_dotenv()
 
-API_BASE = "https://api.cloudflare.com/client/v4"
+API_BASE = CLOUDFLARE["API_BASE"]
 CF_EMAIL = CLOUDFLARE["CF_EMAIL"]
 CF_GLOBAL_KEY = CLOUDFLARE["CF_API_TOKEN"]
 TARGET_URL = CLOUDFLARE["TARGET_URL"]
 
-BASE = "https://api.cloudflare.com/client/v4"
+BASE = CLOUDFLARE["API_BASE"]
+
+# Cloudflare allows 1200 requests per 5 minutes per user, across all threads.
+cf_limiter = RateLimiter(CLOUDFLARE["RATE_LIMIT"], CLOUDFLARE["RATE_PERIOD"])
+# 429s and transient 5xx are retried with backoff + jitter by every call that uses cf_session().
+cf_retry = RetryPolicy("Cloudflare", CLOUDFLARE["MAX_RETRIES"], CLOUDFLARE["BACKOFF_BASE"], CLOUDFLARE["BACKOFF_MAX"])
+
+class CloudflareAPIError(requests.exceptions.HTTPError):
+    """
+    Raised when Cloudflare still returns an error after retries.
+    Subclasses HTTPError, so `e.response` works as with raise_for_status().
+    """
+    def __init__(self, response, message: str = None):
+        self.status_code = response.status_code
+        super().__init__(message or f"API error {response.status_code}: {response.text}", response=response)
+
+def cf_session():
+    """Return the pooled, rate-limited, retrying Cloudflare session (auth headers are built once)."""
+    return get_session("cloudflare", lambda: get_headers(CLOUDFLARE['CF_API_TOKEN']),
+                       limiter=cf_limiter, retry=cf_retry)
+
+def cf_retry_stats() -> dict:
+    """Return request/retry counters and how full the current rate-limit window is."""
+    stats = cf_retry.snapshot()
+    stats["window_used"] = cf_limiter.usage()
+    return stats
+
+def _raise_for_status(r):
+    if not r.ok:
+        raise CloudflareAPIError(r)
 
 def api(method: str, path: str, **kw):
-    headers = get_headers(CLOUDFLARE['CF_API_TOKEN'])
-    r = requests.request(method, f"{BASE}{path}", headers=headers, **kw)
+    r = cf_session().request(method, f"{BASE}{path}", **kw)
     data = r.json() if r.headers.get("content-type","").startswith("application/json") else {}
     if not r.ok or not data.get("success", False):
-        sys.exit(f"API error {r.status_code}: {r.text}")
+        raise CloudflareAPIError(r)
     return data["result"]
 
-def get_zone_id(domain, api_token):
-    url = f"{API_BASE}/zones?name={domain}"
-    resp = requests.get(url, headers=get_headers(api_token))
-    resp.raise_for_status()
-    result = resp.json()
-    if result["success"] and result["result"]:
-        return result["result"][0]["id"]
+def get_zone_id(domain, api_token=None):
+    exists, zone_data = check_zone_exists(domain, api_token)
+    if exists:
+        return zone_data["id"]
     else:
         raise Exception(f"Zone ID not found for {domain}")
 
@@ -56,31 +85,89 @@ def get_headers(api_token):
 # ─── NameServers ───────────────────────────────────────────────────────── #
 def first_account_id(api_token):
     """Return the first account the token has access to."""
-    r = requests.get(f"{API_BASE}/accounts", headers=get_headers(api_token))
-    r.raise_for_status()
+    r = cf_session().get(f"{API_BASE}/accounts")
+    _raise_for_status(r)
     result = r.json().get("result", [])
     if not result or not isinstance(result, list):
-        sys.exit("Could not retrieve account ID – check credentials: No accounts found in API response")
+        raise CloudflareAPIError(r, "Could not retrieve account ID – check credentials: No accounts found in API response")
     try:
         return result[0]["id"]
     except (IndexError, KeyError, TypeError) as e:
-        sys.exit(f"Could not retrieve account ID – check credentials: Could not retrieve account ID from API response: {e}")
+        raise CloudflareAPIError(r, f"Could not retrieve account ID – check credentials: Could not retrieve account ID from API response: {e}")
 
-def check_zone_exists(domain: str, api_token: str) -> tuple[bool, dict]:
+def check_zone_exists(domain: str, api_token: str = None, use_index: bool = True) -> tuple[bool, dict]:
     """
     Check if a zone exists in Cloudflare and return zone details if it does.
+    Answers from the local zone index when it has a fresh entry, unless `use_index`
+    is False (the API is always asked and the answer stored in the index).
     
     Returns:
         tuple: (exists: bool, zone_data: dict or None)
     """
-    r = requests.get(f"{API_BASE}/zones", headers=get_headers(api_token), params={"name": domain})
-    r.raise_for_status()
+    if CLOUDFLARE["USE_ZONE_INDEX"] and use_index:
+        zone_data = zone_index.get(domain)
+        if zone_data:
+            return True, zone_data
+        if not zone_index.is_complete() and CLOUDFLARE["ZONE_INDEX_AUTO_WARM"]:
+            _warm_once()
+            zone_data = zone_index.get(domain)
+            if zone_data:
+                return True, zone_data
+        if zone_index.is_complete():
+            return False, None
+
+    r = cf_session().get(f"{API_BASE}/zones", params={"name": domain})
+    _raise_for_status(r)
     result_list = r.json().get("result", [])
     
     if result_list and isinstance(result_list, list):
+        zone_index.put(result_list[0])
         return True, result_list[0]
     return False, None
 
+def warm_zone_index(per_page: int = 50) -> int:
+    """
+    Walk the paginated /zones listing once and load every zone into the index.
+    
+    Returns:
+        int: number of zones indexed
+    """
+    zones = []
+    page = 1
+    while True:
+        r = cf_session().get(f"{API_BASE}/zones", params={"page": page, "per_page": per_page})
+        _raise_for_status(r)
+        data = r.json()
+        zones.extend(data.get("result", []))
+        total_pages = data.get("result_info", {}).get("total_pages", 1)
+        if page >= total_pages:
+            break
+        page += 1
+    zone_index.put_many(zones, complete=True)
+    zone_index.save()
+    print(f"Indexed {len(zones)} Cloudflare zones")
+    return len(zones)
+
+_warm_lock = threading.Lock()
+_warm_attempted = False
+
+def _warm_once():
+    """Warm the zone index at most once per process (a cold start costs ~N/50 list calls)."""
+    global _warm_attempted
+    with _warm_lock:
+        if _warm_attempted:
+            return
+        _warm_attempted = True
+        try:
+            warm_zone_index()
+        except requests.exceptions.RequestException as e:
+            print(f"Could not warm zone index, falling back to per-domain lookups: {e}")
+
+def invalidate_zone(domain: str = None):
+    """Forget the cached zone for `domain` (or every zone when None)."""
+    zone_index.invalidate(domain)
+    zone_index.save()
+
 def create_new_zone(account_id: str, domain: str, api_token: str) -> dict:
     """
     Create a new zone in Cloudflare.
@@ -89,15 +176,44 @@ def create_new_zone(account_id: str, domain: str, api_token: str) -> dict:
         dict: Zone data with nameservers
     """
     payload = {"name": domain, "account": {"id": account_id}, "type": "full"}
-    r = requests.post(f"{API_BASE}/zones", headers=get_headers(api_token), json=payload)
-    r.raise_for_status()
+    r = cf_session().post(f"{API_BASE}/zones", json=payload)
+    _raise_for_status(r)
     
     result = r.json().get("result")
     if not result or "name_servers" not in result:
         raise RuntimeError(f"Zone creation for '{domain}' did not return nameservers")
     
+    zone_index.put(result)
+    zone_index.save()
     return result
 
+def get_or_create_zone(domain: str, api_token: str, account_id: str = None) -> dict:
+    """
+    Return the zone's details, creating it (type=full) if Cloudflare does not have it.
+    A 400/409 on creation means the zone exists after all (e.g. added outside this tool
+    since the zone index was warmed), so Cloudflare is asked again, bypassing the index.
+    `account_id` is only looked up when a zone has to be created.
+    
+    Returns:
+        dict: Zone data
+    """
+    # First check if zone exists
+    exists, zone_data = check_zone_exists(domain, api_token)
+    if exists:
+        return zone_data
+
+    # Try to create the zone
+    try:
+        return create_new_zone(account_id or first_account_id(api_token), domain, api_token)
+    except requests.exceptions.HTTPError as e:
+        # Handle case where zone exists in another account
+        if e.response.status_code not in [409, 400]:
+            raise
+        exists, zone_data = check_zone_exists(domain, api_token, use_index=False)
+        if not exists:
+            raise RuntimeError(f"Zone '{domain}' exists but could not retrieve its details")
+        return zone_data
+
 def create_zone(account_id: str, domain: str, api_token: str) -> tuple[str, str]:
     """
     Create the zone (type=full) or, if it already exists in this account,
@@ -106,25 +222,7 @@ def create_zone(account_id: str, domain: str, api_token: str) -> tuple[str, str]
     Returns:
         tuple: (nameserver1, nameserver2)
     """
-    # First check if zone exists
-    exists, zone_data = check_zone_exists(domain, api_token)
-    
-    if exists:
-        result = zone_data
-    else:
-        # Try to create the zone
-        try:
-            result = create_new_zone(account_id, domain, api_token)
-        except requests.exceptions.HTTPError as e:
-            # Handle case where zone exists in another account
-            if e.response.status_code in [409, 400]:
-                exists, zone_data = check_zone_exists(domain, api_token)
-                if exists:
-                    result = zone_data
-                else:
-                    raise RuntimeError(f"Zone '{domain}' exists but could not retrieve its details")
-            else:
-                raise
+    result = get_or_create_zone(domain, api_token, account_id)
 
     name_servers = result.get("name_servers")
     if not name_servers or not isinstance(name_servers, list) or len(name_servers) < 2:
@@ -132,8 +230,122 @@ def create_zone(account_id: str, domain: str, api_token: str) -> tuple[str, str]
     
     return name_servers[0], name_servers[1]
 
+# ─── Zone snapshot ──────────────────────────────────────────────────────── #
+class ZoneSnapshot:
+    """
+    One read of a zone's DNS records and page rules, shared by every
+    existence check and update decision for that zone. Our own writes
+    are applied to the snapshot so it stays in sync without re-reading.
+    Snapshots are dropped after CLOUDFLARE['SNAPSHOT_TTL'] seconds, so
+    changes made outside this process are picked up by later workflows.
+    """
+    def __init__(self, zone_id: str):
+        self.zone_id = zone_id
+        self.created_at = time.monotonic()
+        self._dns_records = None
+        self._page_rules = None
+        self._lock = threading.Lock()
+
+    @property
+    def dns_records(self) -> list:
+        with self._lock:
+            if self._dns_records is None:
+                self._dns_records = api("GET", f"/zones/{self.zone_id}/dns_records",
+                                        params={"per_page": 5000})
+            return self._dns_records
+
+    @property
+    def page_rules(self) -> list:
+        with self._lock:
+            if self._page_rules is None:
+                self._page_rules = api("GET", f"/zones/{self.zone_id}/pagerules")
+            return self._page_rules
+
+    def a_records(self, name: str) -> list:
+        name = name.lower()
+        return [r for r in self.dns_records
+                if r["type"] == "A" and r["name"].lower() == name]
+
+    def redirect_rules(self, domain: str) -> list:
+        target_value = f"*{domain}/*"
+        return [r for r in self.page_rules
+                if r["targets"][0]["constraint"]["value"] == target_value]
+
+    def put_dns_record(self, record: dict):
+        with self._lock:
+            if self._dns_records is not None:
+                self._dns_records = [r for r in self._dns_records if r["id"] != record["id"]]
+                self._dns_records.append(record)
+
+    def remove_dns_record(self, record_id: str):
+        with self._lock:
+            if self._dns_records is not None:
+                self._dns_records = [r for r in self._dns_records if r["id"] != record_id]
+
+    def put_page_rule(self, rule: dict):
+        with self._lock:
+            if self._page_rules is not None:
+                self._page_rules = [r for r in self._page_rules if r["id"] != rule["id"]]
+                self._page_rules.append(rule)
+
+    def remove_page_rule(self, rule_id: str):
+        with self._lock:
+            if self._page_rules is not None:
+                self._page_rules = [r for r in self._page_rules if r["id"] != rule_id]
+
+    @property
+    def has_dns_records(self) -> bool:
+        return self._dns_records is not None
+
+    @property
+    def has_page_rules(self) -> bool:
+        return self._page_rules is not None
+
+    def load(self, dns_records: list = None, page_rules: list = None):
+        """Fill the snapshot with state fetched elsewhere (e.g. by the async client)."""
+        with self._lock:
+            if dns_records is not None:
+                self._dns_records = list(dns_records)
+            if page_rules is not None:
+                self._page_rules = list(page_rules)
+
+    def refresh(self):
+        with self._lock:
+            self._dns_records = None
+            self._page_rules = None
+
+    def expired(self, now: float = None) -> bool:
+        return (now or time.monotonic()) - self.created_at >= CLOUDFLARE["SNAPSHOT_TTL"]
+
+_snapshots = {}
+_snapshots_lock = threading.Lock()
+_last_sweep = time.monotonic()
+
+def zone_snapshot(zone_id: str) -> ZoneSnapshot:
+    """Return the shared snapshot for a zone, creating it on first use or once it has expired."""
+    with _snapshots_lock:
+        snapshot = _snapshots.get(zone_id)
+        if snapshot is None or snapshot.expired():
+            global _last_sweep
+            now = time.monotonic()
+            if now - _last_sweep >= CLOUDFLARE["SNAPSHOT_TTL"]:
+                # Drop other expired zones too (at most once per TTL), so the cache does not grow with every zone touched.
+                for stale in [z for z, snap in _snapshots.items() if snap.expired(now)]:
+                    del _snapshots[stale]
+                _last_sweep = now
+            snapshot = _snapshots[zone_id] = ZoneSnapshot(zone_id)
+        return snapshot
+
+def drop_snapshot(zone_id: str = None):
+    """Forget the snapshot for one zone (or all zones) so the next read refetches."""
+    with _snapshots_lock:
+        if zone_id is None:
+            _snapshots.clear()
+        else:
+            _snapshots.pop(zone_id, None)
+
 # ─── Page Rule (301 redirect) ────────────────────────────────────────────── #
-def page_rule_payload(domain: str):
+def page_rule_payload(domain: str, target_url: str = None, status_code: int = 301):
     return {
         "targets": [
             {
@@ -148,8 +360,8 @@ def page_rule_payload(domain: str):
             {
                 "id": "forwarding_url",
                 "value": {
-                    "url": TARGET_URL,
-                    "status_code": 301,
+                    "url": target_url or TARGET_URL,
+                    "status_code": status_code,
                 },
             }
         ],
@@ -159,12 +371,12 @@ def page_rule_payload(domain: str):
 
 def create_page_rule(zone_id, domain):
     payload = page_rule_payload(domain)
-    rules = api("GET", f"/zones/{zone_id}/pagerules")
-    if any(r["targets"][0]["constraint"]["value"] == payload["targets"][0]["constraint"]["value"]
-           for r in rules):
+    snapshot = zone_snapshot(zone_id)
+    if snapshot.redirect_rules(domain):
         print(f"[{domain}] page rule already exists – skipping")
         return
-    api("POST", f"/zones/{zone_id}/pagerules", json=payload)
+    rule = api("POST", f"/zones/{zone_id}/pagerules", json=payload)
+    snapshot.put_page_rule(rule)
     print(f"[{domain}] 301 page rule created")
 
 # ─── Page Rule helpers: UPDATE & DELETE ─────────────────────────────────── #
@@ -173,75 +385,119 @@ def _find_redirect_rules(zone_id: str, domain: str):
     Return a list of Page Rules whose URL-match pattern is '*{domain}/*'
     (the same pattern created by ensure_page_rule()).
     """
-    target_value = f"*{domain}/*"
-    rules = api("GET", f"/zones/{zone_id}/pagerules")
-    return [r for r in rules
-            if r["targets"][0]["constraint"]["value"] == target_value]
+    return zone_snapshot(zone_id).redirect_rules(domain)
+
+PAGE_RULE_SELECTIONS = ("prompt", "all", "highest_priority", "match_url")
+
+def _prompt_for_rule(rules: list, verb: str) -> list:
+    print(f"Which rules do you want to {verb}?")
+    for r in rules:
+        print(f"[{r['id']}] {r['targets'][0]['constraint']['value']} {r['actions'][0]['value']['url']}")
+    print(f"Enter the ID of the rule you want to {verb}:")
+    rule_id = input().lower().strip()
+    return [r for r in rules if r["id"] == rule_id]
+
+def select_page_rules(rules: list, select: str = None, old_url: str = None, verb: str = "update") -> list:
+    """
+    Pick which of the matching Page Rules to act on.
 
-def update_page_rule(zone_id: str, domain: str, new_url: str, status_code: int = 301):
+    select:
+        "prompt"           ask for a rule ID on stdin (the original behaviour)
+        "all"              every matching rule
+        "highest_priority" the single rule with the highest priority number
+        "match_url"        rules currently forwarding to `old_url`
+    Defaults to CLOUDFLARE['PAGE_RULE_SELECT'] / CLOUDFLARE['OLD_TARGET_URL'].
     """
-    Change the forwarding destination (and/or status code) of every
-    Page Rule that matches '*{domain}/*'.
+    select = select or CLOUDFLARE["PAGE_RULE_SELECT"]
+    if select == "prompt":
+        return _prompt_for_rule(rules, verb)
+    if select == "all":
+        return list(rules)
+    if select == "highest_priority":
+        return [max(rules, key=lambda r: r.get("priority", 0))] if rules else []
+    if select == "match_url":
+        old_url = old_url or CLOUDFLARE["OLD_TARGET_URL"]
+        if not old_url:
+            raise ValueError("select='match_url' needs old_url (or CLOUDFLARE['OLD_TARGET_URL'])")
+        return [r for r in rules if r["actions"][0]["value"].get("url") == old_url]
+    raise ValueError(f"Unknown page rule selection '{select}' – use one of {PAGE_RULE_SELECTIONS}")
+
+def page_rule_select_for(select: str = None, max_workers: int = 1) -> str:
+    """
+    Resolve the page rule selection for a workflow run (default CLOUDFLARE['PAGE_RULE_SELECT']).
+    "prompt" reads stdin, so it is refused when several worker threads would prompt at once.
+    """
+    select = select or CLOUDFLARE["PAGE_RULE_SELECT"]
+    if select == "prompt" and (max_workers or 1) > 1:
+        raise ValueError(f"select='prompt' cannot run with {max_workers} workers – "
+                         f"use 'all', 'highest_priority' or 'match_url', or max_workers=1")
+    return select
+
+def update_page_rule(zone_id: str, domain: str, new_url: str, status_code: int = 301,
+                     select: str = None, old_url: str = None):
+    """
+    Change the forwarding destination (and/or status code) of the
+    Page Rules that match '*{domain}/*', chosen by `select`
+    (see select_page_rules). Rules already pointing at new_url are skipped.
     """
     rules = _find_redirect_rules(zone_id, domain)
     if not rules:
         print(f"[{domain}] No Page Rule to update – nothing changed")
         return
     
-    print(f"Which rules do you want to update?")
-    for r in rules:
-        print(f"[{r['id']}] {r['targets'][0]['constraint']['value']} {r['actions'][0]['value']['url']}")
-    
-    print("Enter the ID of the rule you want to update:")
-    rule_id = input().lower().strip()
-    
-    selected_rule = None
-    for r in rules:
-        if r["id"] == rule_id:
-            selected_rule = r
-            break
-    
-    if not selected_rule:
-        print(f"[{domain}] Invalid rule ID – nothing changed")
+    selected_rules = select_page_rules(rules, select, old_url, "update")
+    if not selected_rules:
+        print(f"[{domain}] No matching rule selected – nothing changed")
         return
     
-    payload = {
-        "targets": selected_rule["targets"],          # keep same match pattern
-        "actions": [{
-            "id": "forwarding_url",
-            "value": {
-                "url": new_url,
-                "status_code": status_code,
-            },
-        }],
-        "status": selected_rule["status"],            # keep enabled/disabled
-        "priority": selected_rule["priority"],        # keep original priority
-    }
-    
-    try:
-        api("PUT", f"/zones/{zone_id}/pagerules/{rule_id}", json=payload)
-        print(f"[{domain}] Updated Page Rule {rule_id}")
-    except Exception as e:
-        print(f"[{domain}] Error updating Page Rule {rule_id}: {e}")
+    for selected_rule in selected_rules:
+        rule_id = selected_rule["id"]
+        current = selected_rule["actions"][0]["value"]
+        if current.get("url") == new_url and current.get("status_code") == status_code:
+            print(f"[{domain}] Page Rule {rule_id} already ➔ {new_url} – nothing changed")
+            continue
 
-def delete_page_rule(zone_id: str, domain: str):
+        payload = {
+            "targets": selected_rule["targets"],          # keep same match pattern
+            "actions": [{
+                "id": "forwarding_url",
+                "value": {
+                    "url": new_url,
+                    "status_code": status_code,
+                },
+            }],
+            "status": selected_rule["status"],            # keep enabled/disabled
+            "priority": selected_rule["priority"],        # keep original priority
+        }
+        
+        try:
+            rule = api("PUT", f"/zones/{zone_id}/pagerules/{rule_id}", json=payload)
+            zone_snapshot(zone_id).put_page_rule(rule)
+            print(f"[{domain}] Updated Page Rule {rule_id}")
+        except Exception as e:
+            print(f"[{domain}] Error updating Page Rule {rule_id}: {e}")
+
+def delete_page_rule(zone_id: str, domain: str, select: str = None, old_url: str = None):
     """
-    Remove every Page Rule whose pattern is '*{domain}/*'.
+    Remove the Page Rules whose pattern is '*{domain}/*', chosen by
+    `select` (see select_page_rules).
     """
     rules = _find_redirect_rules(zone_id, domain)
     if not rules:
         print(f"[{domain}] Page Rule does not exist – OK")
         return
-    print(f"Which rules do you want to delete?")
-    for r in rules:
-        print(f"[{r['id']}] {r['targets'][0]['constraint']['value']} {r['actions'][0]['value']['url']}")
-    print("Enter the ID of the rule you want to delete:")
-    rule_id = input().lower().strip()
-    try:
-        api("DELETE", f"/zones/{zone_id}/pagerules/{rule_id}")
-        print(f"[{domain}] Deleted Page Rule {rule_id}")
-    except Exception as e:
-        print(f"[{domain}] Error deleting Page Rule {rule_id}: {e}")
+    selected_rules = select_page_rules(rules, select, old_url, "delete")
+    if not selected_rules:
+        print(f"[{domain}] No matching rule selected – nothing changed")
+        return
+    for selected_rule in selected_rules:
+        rule_id = selected_rule["id"]
+        try:
+            api("DELETE", f"/zones/{zone_id}/pagerules/{rule_id}")
+            zone_snapshot(zone_id).remove_page_rule(rule_id)
+            print(f"[{domain}] Deleted Page Rule {rule_id}")
+        except Exception as e:
+            print(f"[{domain}] Error deleting Page Rule {rule_id}: {e}")
 
 # ─── A Records ────────────────────────────────────────────────────────────── #
 def create_a_record(zone_id, domain, ip, proxied=True):
@@ -253,9 +509,122 @@ def create_a_record(zone_id, domain, ip, proxied=True):
         "ttl": 600,
         "proxied": proxied
     }
-    resp = requests.post(url, json=data, headers=get_headers(CLOUDFLARE['CF_API_TOKEN']))
-    resp.raise_for_status()
-    return resp.json()
+    resp = cf_session().post(url, json=data)
+    _raise_for_status(resp)
+    result = resp.json()
+    if result.get("result"):
+        zone_snapshot(zone_id).put_dns_record(result["result"])
+    return result
+
+# ─── DNS batch writes ───────────────────────────────────────────────────── #
+DNS_BATCH_OPS = ("deletes", "patches", "puts", "posts")
+DNS_SINGLE_METHODS = {"deletes": "DELETE", "patches": "PATCH", "puts": "PUT", "posts": "POST"}
+
+def _api_error(r) -> str:
+    try:
+        errors = r.json().get("errors") or []
+    except ValueError:
+        errors = []
+    if errors:
+        return "; ".join(f"{e.get('code')}: {e.get('message')}" for e in errors)
+    return f"HTTP {r.status_code}: {r.text}"
+
+def _batch_entry(op, sent, ok, record=None, error=None):
+    return {
+        "op": op,
+        "id": (record or sent).get("id"),
+        "name": (record or sent).get("name"),
+        "ok": ok,
+        "record": record,
+        "error": error,
+    }
+
+def _sync_batch_snapshot(zone_id: str, report: list):
+    snapshot = zone_snapshot(zone_id)
+    for entry in report:
+        if not entry["ok"]:
+            continue
+        if entry["op"] == "deletes":
+            snapshot.remove_dns_record(entry["id"])
+        elif entry["record"] and "type" in entry["record"]:
+            snapshot.put_dns_record(entry["record"])
+
+def _apply_dns_ops_individually(zone_id: str, ops: dict) -> list:
+    report = []
+    for op in DNS_BATCH_OPS:
+        for sent in ops[op]:
+            path = f"{BASE}/zones/{zone_id}/dns_records"
+            body = None
+            if op == "posts":
+                body = sent
+            else:
+                path = f"{path}/{sent['id']}"
+                if op != "deletes":
+                    body = {k: v for k, v in sent.items() if k != "id"}
+            r = cf_session().request(DNS_SINGLE_METHODS[op], path, json=body)
+            if r.ok:
+                report.append(_batch_entry(op, sent, True, record=r.json().get("result") or sent))
+            else:
+                report.append(_batch_entry(op, sent, False, error=_api_error(r)))
+    return report
+
+def batch_dns_records(zone_id: str, posts: list = None, puts: list = None,
+                      patches: list = None, deletes: list = None, fallback: bool = True) -> list:
+    """
+    Send every create (posts), full update (puts), partial update (patches)
+    and delete for one zone in a single /dns_records/batch call.
+
+    Cloudflare applies a batch all-or-nothing (deletes, patches, puts, posts).
+    If it is rejected and `fallback` is set, each record is sent on its own
+    so the report shows exactly which records failed.
+
+    Returns:
+        list: one {"op", "id", "name", "ok", "record", "error"} dict per record
+    """
+    ops = {
+        "posts": list(posts or []),
+        "puts": list(puts or []),
+        "patches": list(patches or []),
+        "deletes": [d if isinstance(d, dict) else {"id": d} for d in deletes or []],
+    }
+    body = {op: ops[op] for op in DNS_BATCH_OPS if ops[op]}
+    if not body:
+        return []
+
+    r = cf_session().post(f"{BASE}/zones/{zone_id}/dns_records/batch", json=body)
+    data = r.json() if r.headers.get("content-type", "").startswith("application/json") else {}
+    if r.ok and data.get("success", False):
+        result = data.get("result") or {}
+        report = []
+        for op in DNS_BATCH_OPS:
+            returned = result.get(op) or []
+            for i, sent in enumerate(ops[op]):
+                record = returned[i] if i < len(returned) else sent
+                report.append(_batch_entry(op, sent, True, record=record))
+    else:
+        error = _api_error(r)
+        if fallback:
+            print(f"[{zone_id}] DNS batch rejected ({error}) – retrying records one by one")
+            report = _apply_dns_ops_individually(zone_id, ops)
+        else:
+            report = [_batch_entry(op, sent, False, error=error)
+                      for op in DNS_BATCH_OPS for sent in ops[op]]
+
+    _sync_batch_snapshot(zone_id, report)
+    return report
+
+def print_batch_report(label: str, report: list):
+    for entry in report:
+        if entry["ok"]:
+            print(f"[{label}] {entry['op'][:-1]} {entry['id']} ✅")
+        else:
+            print(f"[{label}] {entry['op'][:-1]} {entry['id'] or entry['name']} ❌ {entry['error']}")
+
+def raise_for_batch_report(label: str, report: list):
+    """Raise if any record in a batch report failed, so callers see it like a failed single call."""
+    failed = [e for e in report if not e["ok"]]
+    if failed:
+        raise RuntimeError(f"[{label}] {len(failed)} of {len(report)} DNS record change(s) failed: {failed[0]['error']}")
 
 # ─── DNS helpers: UPDATE & DELETE  ───────────────────────────────────────── #
 def get_a_records(zone_id: str, zone_name: str, api_token: str):
@@ -264,8 +633,7 @@ def get_a_records(zone_id: str, zone_name: str, api_token: str):
     Cloudflare stores the "@" record internally under the full zone name,
     so we search with name == zone_name.
     """
-    params = {"type": "A", "name": zone_name}
-    return api("GET", f"/zones/{zone_id}/dns_records", params=params)
+    return zone_snapshot(zone_id).a_records(zone_name)
 
 def update_a_record(zone_id: str, zone_name: str, new_ip: str,
                     proxied: bool = True):
@@ -278,6 +646,25 @@ def update_a_record(zone_id: str, zone_name: str, new_ip: str,
         print(f"[{zone_name}] No A record to update (nothing changed)")
         return
 
+    records = [r for r in records if r["content"] != new_ip or r.get("proxied") != proxied]
+    if not records:
+        print(f"[{zone_name}] A record already ➔ {new_ip} (proxied={proxied}) – nothing changed")
+        return
+
+    if len(records) > 1:
+        puts = [{
+            "id": r["id"],
+            "type": "A",
+            "name": r["name"],
+            "content": new_ip,
+            "ttl": 600,
+            "proxied": proxied,
+        } for r in records]
+        report = batch_dns_records(zone_id, puts=puts)
+        print_batch_report(zone_name, report)
+        raise_for_batch_report(zone_name, report)
+        return report
+
     for r in records:
         payload = {
             "type": "A",
@@ -286,7 +673,8 @@ def update_a_record(zone_id: str, zone_name: str, new_ip: str,
             "ttl": 600,
             "proxied": proxied,
         }
-        api("PUT", f"/zones/{zone_id}/dns_records/{r['id']}", json=payload)
+        record = api("PUT", f"/zones/{zone_id}/dns_records/{r['id']}", json=payload)
+        zone_snapshot(zone_id).put_dns_record(record)
         print(f"[{zone_name}] A record {r['id']} ➔ {new_ip} (proxied={proxied})")
 
 def delete_a_record(zone_id: str, zone_name: str):
@@ -298,18 +686,23 @@ def delete_a_record(zone_id: str, zone_name: str):
         print(f"[{zone_name}] A record does not exist – OK")
         return
 
+    if len(records) > 1:
+        report = batch_dns_records(zone_id, deletes=[r["id"] for r in records])
+        print_batch_report(zone_name, report)
+        raise_for_batch_report(zone_name, report)
+        return report
+
     for r in records:
         api("DELETE", f"/zones/{zone_id}/dns_records/{r['id']}")
+        zone_snapshot(zone_id).remove_dns_record(r["id"])
         print(f"[{zone_name}] Deleted A record {r['id']}")
 
-def a_record_exists(zone_id, domain):
-    url = f"{API_BASE}/zones/{zone_id}/dns_records?type=A&name={domain}"
-    headers = get_headers(CLOUDFLARE['CF_API_TOKEN'])
-    resp = requests.get(url, headers=headers)
-    resp.raise_for_status()
-    records = resp.json().get("result", [])
-    for record in records:
-        if record["type"] == "A" and record["name"] == domain:
+def a_record_exists(zone_id, domain, ip=None):
+    """
+    True if the zone has a root A record for `domain` (pointing at `ip`, when given).
+    """
+    for record in zone_snapshot(zone_id).a_records(domain):
+        if ip is None or record["content"] == ip:
             return True
     return False
 
@@ -320,9 +713,10 @@ def add_domains_to_cloudflare(domains):
                         "   1. Get your token from: https://dash.cloudflare.com/profile/api-tokens")
     
     cloudflare_domains_nameservers = {}
-    summary = add_to_cloudflare(domains, CLOUDFLARE['CF_API_TOKEN'])
-    for d in summary:
-        cloudflare_domains_nameservers[d[0]] = [d[1], d[2]]
+    account_id = first_account_id(CLOUDFLARE['CF_API_TOKEN'])
+    for domain in domains:
+        ns1, ns2 = create_zone(account_id, domain, CLOUDFLARE['CF_API_TOKEN'])
+        cloudflare_domains_nameservers[domain] = [ns1, ns2]
     return cloudflare_domains_nameservers 
 
 def get_cloudflare_domains_nameservers():
@@ -0,0 +1,164 @@
+from utils.config import CLOUDFLARE
+from services.cloudflare_functions import api, batch_dns_records, check_zone_exists, get_or_create_zone, page_rule_payload, raise_for_batch_report, zone_snapshot
+
+"""
+Desired-state reconciler for A records and page rules.
+
+plan_domain() reads a zone once and returns the smallest set of changes
+that brings it to the desired A-record IP / proxied flag and redirect
+target. print_plan() shows the diff, apply_plan() makes only those writes.
+"""
+
+SYMBOLS = {"create": "+", "update": "~", "delete": "-", "noop": "="}
+
+def _change(domain, kind, action, id=None, current=None, desired=None):
+    return {"domain": domain, "kind": kind, "action": action, "id": id, "current": current, "desired": desired}
+
+def _rule_target(rule):
+    value = rule["actions"][0].get("value", {})
+    return value.get("url"), value.get("status_code")
+
+def plan_domain(domain: str, ip: str = None, proxied: bool = True, target_url: str = None, status_code: int = 301) -> dict:
+    """
+    Compare a domain's current state with the desired state.
+    `ip=None` leaves A records alone and `target_url=None` leaves page rules alone.
+
+    Returns:
+        dict: {"domain", "zone_id", "changes": [change, ...]}
+    """
+    exists, zone_data = check_zone_exists(domain)
+    changes = []
+    if not exists:
+        changes.append(_change(domain, "zone", "create", desired=domain))
+        if ip:
+            changes.append(_change(domain, "a_record", "create", desired={"content": ip, "proxied": proxied}))
+        if target_url:
+            changes.append(_change(domain, "page_rule", "create", desired={"url": target_url, "status_code": status_code}))
+        return {"domain": domain, "zone_id": None, "changes": changes}
+
+    zone_id = zone_data["id"]
+    snapshot = zone_snapshot(zone_id)
+    desired_record = {"content": ip, "proxied": proxied}
+    desired_rule = {"url": target_url, "status_code": status_code}
+
+    if ip:
+        records = snapshot.a_records(domain)
+        # Keep a record that already matches if there is one, so a converged zone is a no-op.
+        records.sort(key=lambda r: (r["content"], r.get("proxied")) != (ip, proxied))
+        if not records:
+            changes.append(_change(domain, "a_record", "create", desired=desired_record))
+        else:
+            keep, extras = records[0], records[1:]
+            current = {"content": keep["content"], "proxied": keep.get("proxied")}
+            action = "noop" if current == desired_record else "update"
+            changes.append(_change(domain, "a_record", action, keep["id"], current, desired_record))
+            for r in extras:
+                changes.append(_change(domain, "a_record", "delete", r["id"],
+                                       {"content": r["content"], "proxied": r.get("proxied")}))
+
+    if target_url:
+        rules = snapshot.redirect_rules(domain)
+        rules.sort(key=lambda r: _rule_target(r) != (target_url, status_code))
+        if not rules:
+            changes.append(_change(domain, "page_rule", "create", desired=desired_rule))
+        else:
+            keep, extras = rules[0], rules[1:]
+            url, code = _rule_target(keep)
+            current = {"url": url, "status_code": code}
+            action = "noop" if current == desired_rule else "update"
+            changes.append(_change(domain, "page_rule", action, keep["id"], current, desired_rule))
+            for r in extras:
+                url, code = _rule_target(r)
+                changes.append(_change(domain, "page_rule", "delete", r["id"], {"url": url, "status_code": code}))
+
+    return {"domain": domain, "zone_id": zone_id, "changes": changes}
+
+def _describe(value):
+    if not value:
+        return ""
+    if isinstance(value, str):
+        return value
+    if "content" in value:
+        return f"{value['content']} (proxied={value['proxied']})"
+    return f"{value['url']} ({value['status_code']})"
+
+def print_plan(plans: list) -> dict:
+    """
+    Print a dry-run diff for every domain and return the action counts.
+    """
+    counts = {"create": 0, "update": 0, "delete": 0, "noop": 0}
+    for plan in plans:
+        for c in plan["changes"]:
+            counts[c["action"]] += 1
+        if all(c["action"] == "noop" for c in plan["changes"]):
+            continue
+        print(f"[{plan['domain']}]")
+        for c in plan["changes"]:
+            line = f"  {SYMBOLS[c['action']]} {c['kind']}"
+            if c["action"] == "update":
+                line += f" {_describe(c['current'])} ➔ {_describe(c['desired'])}"
+            elif c["action"] == "delete":
+                line += f" {c['id']} {_describe(c['current'])}"
+            else:
+                line += f" {_describe(c['desired'])}"
+            print(line)
+    writes = counts["create"] + counts["update"] + counts["delete"]
+    print(f"📋 Plan: {counts['create']} to create, {counts['update']} to update, "
+          f"{counts['delete']} to delete, {counts['noop']} unchanged ({writes} writes)")
+    return counts
+
+def apply_plan(plan: dict) -> list:
+    """
+    Apply one domain's plan, skipping no-ops. A-record changes go out in one DNS batch.
+
+    Returns:
+        list: the batch report for A-record changes (empty if there were none)
+    """
+    domain = plan["domain"]
+    changes = [c for c in plan["changes"] if c["action"] != "noop"]
+    if not changes:
+        return []
+
+    zone_id = plan["zone_id"]
+    if zone_id is None:
+        zone_id = get_or_create_zone(domain, CLOUDFLARE['CF_API_TOKEN'])["id"]
+        print(f"[{domain}] Zone ready")
+
+    posts, puts, deletes = [], [], []
+    for c in changes:
+        if c["kind"] != "a_record":
+            continue
+        if c["action"] == "delete":
+            deletes.append(c["id"])
+            continue
+        record = {"type": "A", "name": domain, "content": c["desired"]["content"],
+                  "ttl": 600, "proxied": c["desired"]["proxied"]}
+        if c["action"] == "create":
+            posts.append(record)
+        else:
+            puts.append({"id": c["id"], **record})
+    report = batch_dns_records(zone_id, posts=posts, puts=puts, deletes=deletes)
+    raise_for_batch_report(domain, report)
+
+    snapshot = zone_snapshot(zone_id)
+    for c in changes:
+        if c["kind"] != "page_rule":
+            continue
+        if c["action"] == "delete":
+            api("DELETE", f"/zones/{zone_id}/pagerules/{c['id']}")
+            snapshot.remove_page_rule(c["id"])
+            continue
+        payload = page_rule_payload(domain, c["desired"]["url"], c["desired"]["status_code"])
+        if c["action"] == "create":
+            rule = api("POST", f"/zones/{zone_id}/pagerules", json=payload)
+        else:
+            current = next((r for r in snapshot.page_rules if r["id"] == c["id"]), None)
+            if current:
+                payload["targets"] = current["targets"]
+                payload["status"] = current["status"]
+                payload["priority"] = current["priority"]
+            rule = api("PUT", f"/zones/{zone_id}/pagerules/{c['id']}", json=payload)
+        snapshot.put_page_rule(rule)
+
+    print(f"[{domain}] Applied {len(changes)} change(s)")
+    return report
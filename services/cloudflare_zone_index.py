@@ -0,0 +1,95 @@
+import atexit
+import json
+import os
+import threading
+import time
+from utils.config import CLOUDFLARE
+
+ZONE_FIELDS = ("id", "name", "name_servers", "status")
+
+class ZoneIndex:
+    """
+    A domain -> zone index persisted to a JSON file.
+
+    Entries older than `ttl` seconds are treated as missing. After a full
+    warm-up (see `warm_zone_index` in cloudflare_functions) a miss is
+    authoritative until the warm-up itself is older than `ttl`.
+    """
+    def __init__(self, path, ttl):
+        self.path = path
+        self.ttl = ttl
+        self._zones = {}
+        self._warmed_at = 0
+        self._dirty = False
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            self._zones = data.get("zones", {})
+            self._warmed_at = data.get("warmed_at", 0)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable zone index {self.path}: {e}")
+
+    def save(self):
+        """Write the index to disk if anything changed since the last save."""
+        with self._lock:
+            if not self._dirty or not self.path:
+                return
+            data = {"warmed_at": self._warmed_at, "zones": dict(self._zones)}
+            self._dirty = False
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.path)
+
+    def _fresh(self, stamp):
+        return time.time() - stamp < self.ttl
+
+    def get(self, domain):
+        """Return the cached zone dict for `domain`, or None if missing or expired."""
+        entry = self._zones.get(domain.lower())
+        if entry and self._fresh(entry["cached_at"]):
+            return entry["zone"]
+        return None
+
+    def is_complete(self):
+        """True while a full warm-up is fresh, so a miss means the zone does not exist."""
+        return bool(self._warmed_at) and self._fresh(self._warmed_at)
+
+    def put(self, zone):
+        with self._lock:
+            self._put(zone, time.time())
+
+    def put_many(self, zones, complete=False):
+        now = time.time()
+        with self._lock:
+            for zone in zones:
+                self._put(zone, now)
+            if complete:
+                self._warmed_at = now
+
+    def _put(self, zone, now):
+        compact = {k: zone.get(k) for k in ZONE_FIELDS}
+        self._zones[zone["name"].lower()] = {"zone": compact, "cached_at": now}
+        self._dirty = True
+
+    def invalidate(self, domain=None):
+        """
+        Drop one domain, or the whole index when `domain` is None. Dropping one domain keeps
+        the index complete; to pick up a zone created elsewhere, look it up with use_index=False.
+        """
+        with self._lock:
+            if domain is None:
+                self._zones.clear()
+                self._warmed_at = 0
+            else:
+                self._zones.pop(domain.lower(), None)
+            self._dirty = True
+
+zone_index = ZoneIndex(CLOUDFLARE["ZONE_INDEX_PATH"], CLOUDFLARE["ZONE_INDEX_TTL"])
+atexit.register(zone_index.save)
@@ -0,0 +1,57 @@
+import pandas as pd
+
+"""
+Which provider knows about which domain.
+
+Each provider's listing is normalized (lowercase, no trailing dot) and kept
+as a frozenset, so single lookups are O(1), set operations ("in Bison but not
+Porkbun") are plain set algebra and whole columns are matched with one
+hash join instead of a scan per domain.
+"""
+
+def normalize_domain(domain):
+    return domain.strip().lower().rstrip(".") if isinstance(domain, str) else domain
+
+class DomainIndex:
+    """
+    Provider name -> set of domains, built once from each provider's listing.
+    """
+    def __init__(self, **listings):
+        self.providers = {}
+        for provider, domains in listings.items():
+            self.add(provider, domains)
+
+    def add(self, provider, domains):
+        """Index (or replace) a provider's listing; `domains` may be any iterable, e.g. a Series or generator."""
+        if isinstance(domains, pd.Series):
+            domains = domains.dropna().astype(str).str.strip().str.lower().str.rstrip(".")
+        else:
+            domains = (normalize_domain(d) for d in domains if isinstance(d, str))
+        self.providers[provider] = frozenset(domains)
+        return self
+
+    def domains(self, provider):
+        return self.providers.get(provider, frozenset())
+
+    def contains(self, provider, domain):
+        return normalize_domain(domain) in self.domains(provider)
+
+    def providers_of(self, domain):
+        """Return every provider listing `domain`."""
+        domain = normalize_domain(domain)
+        return [provider for provider, domains in self.providers.items() if domain in domains]
+
+    def only(self, provider, *others):
+        """Domains in `provider` but in none of `others` (all other providers if none are given)."""
+        others = others or [p for p in self.providers if p != provider]
+        return self.domains(provider).difference(*(self.domains(p) for p in others))
+
+    def common(self, *providers):
+        """Domains listed by every one of `providers`."""
+        providers = providers or list(self.providers)
+        return frozenset.intersection(*(self.domains(p) for p in providers)) if providers else frozenset()
+
+    def isin(self, provider, domains: pd.Series) -> pd.Series:
+        """Vectorized membership of a column of domains in a provider's listing."""
+        normalized = domains.astype(str).str.strip().str.lower().str.rstrip(".")
+        return normalized.isin(self.domains(provider)) & domains.notna()
@@ -2,16 +2,21 @@ import requests
 from dotenv import load_dotenv
 import os
 from utils.config import EMAILGUARD
+from utils.transport import get_session
 
 load_dotenv()
 
 EMAILGUARD_TOKEN = EMAILGUARD["EMAILGUARD_TOKEN"]
 
+def eg_session():
+    """Return the pooled EmailGuard session (auth headers are built once)."""
+    return get_session("emailguard", {
+        "Authorization": f"Bearer {EMAILGUARD_TOKEN}",
+        "Content-Type": "application/json"
+    })
+
 def get_proxy_ip():
-    resp = requests.get(
-        "https://app.emailguard.io/api/v1/domain-masking-proxies/ip",
-        headers={"Authorization": f"Bearer {EMAILGUARD_TOKEN}"}
-    )
+    resp = eg_session().get("https://app.emailguard.io/api/v1/domain-masking-proxies/ip")
     resp.raise_for_status()
     return resp.json()["data"]["ip_address"]
 
@@ -21,11 +26,7 @@ def create_masking_proxy(masking_domain, primary_domain):
         "masking_domain": f"{masking_domain}",
         "primary_domain": f"{primary_domain}"
     }
-    headers = {
-        "Authorization": f"Bearer {EMAILGUARD_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    resp = requests.post(url, json=data, headers=headers)
+    resp = eg_session().post(url, json=data)
     try:
         resp.raise_for_status()
     except requests.exceptions.HTTPError:
@@ -36,11 +37,7 @@ def create_masking_proxy(masking_domain, primary_domain):
 
 def get_redirect_url(domain):
     url = "https://app.emailguard.io/api/v1/hosted-domain-redirects"
-    headers = {
-        "Authorization": f"Bearer {EMAILGUARD_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    resp = requests.get(url, headers=headers)
+    resp = eg_session().get(url)
     try:
         resp.raise_for_status()
     except requests.exceptions.HTTPError:
@@ -51,11 +48,7 @@ def get_redirect_url(domain):
 
 def delete_redirect(uuid):
     url = f"https://app.emailguard.io/api/v1/hosted-domain-redirects/{uuid}"
-    headers = {
-        "Authorization": f"Bearer {EMAILGUARD_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    resp = requests.delete(url, headers=headers)
+    resp = eg_session().delete(url)
     try:
         resp.raise_for_status()
     except requests.exceptions.HTTPError:
@@ -69,11 +62,7 @@ def create_redirect(domain, new_url):
         "domain": f"{domain}",
         "redirect": f"{new_url}"
     }
-    headers = {
-        "Authorization": f"Bearer {EMAILGUARD_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    resp = requests.post(url, json=data, headers=headers)
+    resp = eg_session().post(url, json=data)
     try:
         resp.raise_for_status()
     except requests.exceptions.HTTPError:
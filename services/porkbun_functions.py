@@ -1,31 +1,81 @@
 import os
 from dotenv import load_dotenv
-import requests
 import pandas as pd
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
-from utils.config import PORKBUN, DOMAINS, CLOUDFLARE
+from utils.config import PORKBUN, CLOUDFLARE
+from utils.transport import get_session
+from utils.rate_limit import TokenBucket
+from utils.retry import RetryPolicy
+from services.porkbun_inventory import inventory
 
 load_dotenv()
 
 PORKBUN_API_KEY = PORKBUN["PORKBUN_KEY"]
 PORKBUN_SECRET_API_KEY = PORKBUN["PORKBUN_SECRET"]
 
-def get_domains(api_key, secret_api_key, start=0):
-    try:
-        url = "https://api.porkbun.com/api/json/v3/domain/listAll"
-        payload = {
-            "secretapikey": secret_api_key,
-            "apikey": api_key,
-            "start": str(start),
-            "includeLabels": "yes"
-        }
-        response = requests.post(url, json=payload)
-        data = response.json()
-        return data['domains']
-    except Exception as e:
-        print(f"Error with getting porkbun domains: {e}")
-        return []
+def is_rate_limited(response):
+    """Porkbun signals throttling with 429/503 or an ERROR body that mentions the rate limit."""
+    if response.status_code in (429, 503):
+        return True
+    return response.status_code == 400 and "limit" in response.text.lower()
+
+# One bucket for every Porkbun endpoint (getNs, updateNs, addUrlForward, dns/retrieve, ...) and every worker.
+porkbun_limiter = TokenBucket(PORKBUN["RATE_PER_SECOND"], PORKBUN["BURST"], is_throttled=is_rate_limited)
+# The same throttle check drives retries, so a "limit" 400 is retried after backing off instead of failing.
+porkbun_retry = RetryPolicy("Porkbun", PORKBUN["MAX_RETRIES"], rate_limit_statuses=(429, 503), is_throttled=is_rate_limited)
+
+def porkbun_retry_stats():
+    """Return request/retry counters for every Porkbun call made so far."""
+    return porkbun_retry.snapshot()
+
+def porkbun_session():
+    """Return the pooled, rate-limited Porkbun session (Porkbun authenticates in the JSON body, not headers)."""
+    return get_session("porkbun", {"Content-Type": "application/json"},
+                       limiter=porkbun_limiter, retry=porkbun_retry)
+
+LIST_ALL_PAGE_SIZE = 1000 # listAll returns at most this many domains per `start` offset
+
+def get_domains_page(api_key, secret_api_key, start=0):
+    """Get one page of domains from listAll, raising instead of returning a partial list."""
+    url = "https://api.porkbun.com/api/json/v3/domain/listAll"
+    payload = {
+        "secretapikey": secret_api_key,
+        "apikey": api_key,
+        "start": str(start),
+        "includeLabels": "yes"
+    }
+    response = porkbun_session().post(url, json=payload)
+    if response.status_code != 200:
+        raise RuntimeError(f"HTTP {response.status_code} error listing Porkbun domains at start={start}")
+    data = response.json()
+    if data.get('status') != "SUCCESS":
+        raise RuntimeError(f"API error listing Porkbun domains at start={start}: {data.get('message')}")
+    return data.get('domains') or []
+
+def iter_domains(api_key=None, secret_api_key=None, prefetch=True):
+    """
+    Yield every domain record in the account, one at a time, walking listAll page by page.
+    With `prefetch`, the next page is requested while the caller works through the current one.
+    """
+    api_key = api_key or PORKBUN_API_KEY
+    secret_api_key = secret_api_key or PORKBUN_SECRET_API_KEY
+    with ThreadPoolExecutor(1) as executor:
+        start = 0
+        future = executor.submit(get_domains_page, api_key, secret_api_key, start)
+        while future is not None:
+            page = future.result()
+            start += LIST_ALL_PAGE_SIZE
+            more = len(page) >= LIST_ALL_PAGE_SIZE
+            future = executor.submit(get_domains_page, api_key, secret_api_key, start) if more and prefetch else None
+            yield from page
+            if more and not prefetch:
+                future = executor.submit(get_domains_page, api_key, secret_api_key, start)
+
+def iter_domain_names(api_key=None, secret_api_key=None, prefetch=True):
+    """Yield just the domain names from iter_domains."""
+    for domain in iter_domains(api_key, secret_api_key, prefetch):
+        yield domain.get('domain')
 
 def get_nameservers(domain, api_key, secret_api_key):
     try:
@@ -34,7 +84,7 @@ def get_nameservers(domain, api_key, secret_api_key):
             "secretapikey": secret_api_key,
             "apikey": api_key
         }
-        response = requests.post(url, json=payload)
+        response = porkbun_session().post(url, json=payload)
         if response.status_code != 200:
             print(f"HTTP {response.status_code} error getting nameservers for {domain}")
             return 'error'
@@ -59,7 +109,8 @@ def update_nameservers(domain, nameservers, api_key, secret_api_key):
             "apikey": api_key,
             "ns": nameservers
             }
-        response = requests.post(url, json=payload)
+        response = porkbun_session().post(url, json=payload)
+        inventory.invalidate(domain, "nameservers")
         if response.status_code != 200:
             print(f"HTTP {response.status_code} error updating nameservers for {domain}")
             return 'error'
@@ -68,7 +119,8 @@ def update_nameservers(domain, nameservers, api_key, secret_api_key):
         print(f"Unexpected error for {domain}: {str(e)}")
         return 'unexpected_error'
 
-def add_forwarding(domain, new_url, api_key, secret_api_key):
+def add_forwarding(domain, new_url, api_key, secret_api_key,
+                   forward_type="temporary", include_path="no", wildcard="yes"):
     try:
         url = f"https://api.porkbun.com/api/json/v3/domain/addUrlForward/{domain}"
         payload = {
@@ -76,11 +128,12 @@ def add_forwarding(domain, new_url, api_key, secret_api_key):
             "apikey": api_key,
             "subdomain": "",
             "location": new_url,
-            "type": "temporary",
-            "includePath": "no",
-            "wildcard": "yes"
+            "type": forward_type,
+            "includePath": include_path,
+            "wildcard": wildcard
         }
-        response = requests.post(url, json=payload)
+        response = porkbun_session().post(url, json=payload)
+        inventory.invalidate(domain, "forwards")
         if response.status_code != 200:
             print(f"HTTP {response.status_code} error adding forwarding for {domain}")
             return 'error'
@@ -96,7 +149,7 @@ def get_forwarding(domain, api_key, secret_api_key):
             "secretapikey": secret_api_key,
             "apikey": api_key
         }
-        response = requests.post(url, json=payload)
+        response = porkbun_session().post(url, json=payload)
         if response.status_code != 200:
             print(f"HTTP {response.status_code} error getting forwarding for {domain}")
             return 'error'
@@ -112,7 +165,8 @@ def delete_forwarding(domain, record_id, api_key, secret_api_key):
             "secretapikey": secret_api_key,
             "apikey": api_key
         }
-        response = requests.post(url, json=payload)
+        response = porkbun_session().post(url, json=payload)
+        inventory.invalidate(domain, "forwards")
         if response.status_code != 200:
             print(f"HTTP {response.status_code} error deleting forwarding for {domain}")
             return 'error'
@@ -122,8 +176,7 @@ def delete_forwarding(domain, record_id, api_key, secret_api_key):
         return 'unexpected_error'
 
 def get_porkbun_nameservers(domain):
-    time.sleep(1.2)
-    nameservers = get_nameservers(domain)
+    nameservers = get_nameservers(domain, PORKBUN['PORKBUN_KEY'], PORKBUN['PORKBUN_SECRET'])
     if nameservers == 'error' or nameservers == 'api_error' or nameservers == 'unexpected_error':
         ns_list = []
     else:
@@ -131,12 +184,15 @@ def get_porkbun_nameservers(domain):
     print(f"Processed {domain}")
     return domain, ns_list
 
-def get_all_domains_with_nameservers():
-    """Get all Porkbun domains with their current nameservers."""
+def get_all_domains_with_nameservers(domains=None, max_workers=None):
+    """
+    Get Porkbun domains with their current nameservers, fetched in parallel under the shared rate limit.
+    `domains` defaults to every domain in the account (the paginated listAll walk).
+    """
     porkbun_domains_nameservers = {}
-    for domain in DOMAINS:
-        domain, nameservers = get_porkbun_nameservers(domain)
-        porkbun_domains_nameservers[domain] = nameservers
+    with ThreadPoolExecutor(max_workers or PORKBUN['MAX_WORKERS']) as executor:
+        for domain, nameservers in executor.map(get_porkbun_nameservers, iter_domain_names() if domains is None else domains):
+            porkbun_domains_nameservers[domain] = nameservers
     return porkbun_domains_nameservers
 
 def update_domain_nameservers(domain, nameservers):
@@ -151,7 +207,7 @@ def get_dns_records(domain, api_key, secret_api_key):
             "secretapikey": secret_api_key,
             "apikey": api_key
         }
-        response = requests.post(url, json=payload)
+        response = porkbun_session().post(url, json=payload)
         if response.status_code != 200:
             print(f"HTTP {response.status_code} error getting DNS records for {domain}")
             return 'error'
@@ -160,4 +216,45 @@ def get_dns_records(domain, api_key, secret_api_key):
         return dns
     except Exception as e:
         print(f"Unexpected error for dns records for {domain}: {str(e)}")
-        return 'unexpected_error'
\ No newline at end of file
+        return 'unexpected_error'
+
+# ---------------------- Inventory-cached reads --------------------------------------
+
+ERROR_RESULTS = ('error', 'api_error', 'unexpected_error')
+
+def _cacheable(value):
+    return value is not None and not (isinstance(value, str) and value in ERROR_RESULTS)
+
+def get_nameservers_cached(domain, api_key, secret_api_key):
+    """get_nameservers, answered from the local inventory while it is fresh."""
+    return inventory.fetch(domain, "nameservers",
+                           lambda: get_nameservers(domain, api_key, secret_api_key), _cacheable)
+
+def get_forwarding_cached(domain, api_key, secret_api_key):
+    """get_forwarding, answered from the local inventory while it is fresh."""
+    return inventory.fetch(domain, "forwards",
+                           lambda: get_forwarding(domain, api_key, secret_api_key), _cacheable)
+
+def get_dns_records_cached(domain, api_key, secret_api_key):
+    """get_dns_records, answered from the local inventory while it is fresh."""
+    return inventory.fetch(domain, "dns_records",
+                           lambda: get_dns_records(domain, api_key, secret_api_key), _cacheable)
+
+def iter_domains_cached(api_key=None, secret_api_key=None):
+    """
+    iter_domains, replayed from the local inventory while the last full listing is fresh.
+    A live walk is written back page by page and marked complete once it finishes.
+    """
+    cached = inventory.listing()
+    if cached is not None:
+        yield from cached
+        return
+    stamp = time.time()
+    page = []
+    for record in iter_domains(api_key, secret_api_key):
+        page.append(record)
+        if len(page) >= LIST_ALL_PAGE_SIZE:
+            inventory.put_listing(page, stamp, complete=False)
+            page = []
+        yield record
+    inventory.put_listing(page, stamp, complete=True)
@@ -0,0 +1,127 @@
+import json
+import sqlite3
+import threading
+import time
+from utils.config import PORKBUN
+
+"""
+Local SQLite cache of Porkbun domain state. Every field has its own
+freshness timestamp, so a report only refetches what has gone stale.
+"""
+
+FIELDS = ("listing", "nameservers", "forwards", "dns_records")
+MISSING = object()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS domains (
+    domain TEXT PRIMARY KEY,
+    status TEXT,
+    labels TEXT,
+    listing_at REAL,
+    nameservers TEXT,
+    nameservers_at REAL,
+    forwards TEXT,
+    forwards_at REAL,
+    dns_records TEXT,
+    dns_records_at REAL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value REAL
+);
+"""
+
+class PorkbunInventory:
+    """
+    A domain -> {listing, nameservers, forwards, dns_records} cache backed by SQLite.
+    `ttl` maps each field to the number of seconds it stays fresh.
+    """
+    def __init__(self, path, ttl):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._db = None
+
+    @property
+    def _conn(self):
+        # Opened on first use so importing the services does not create the file.
+        if self._db is None:
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.executescript(SCHEMA)
+        return self._db
+
+    def _fresh(self, stamp, field):
+        return stamp is not None and time.time() - stamp < self.ttl[field]
+
+    def get(self, domain, field):
+        """Return the cached value for one field, or MISSING if absent or stale."""
+        column = "labels" if field == "listing" else field
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT status, {column}, {field}_at FROM domains WHERE domain = ?", (domain,)
+            ).fetchone()
+        if not row or not self._fresh(row[2], field):
+            return MISSING
+        if field == "listing":
+            return {"domain": domain, "status": row[0], "labels": json.loads(row[1] or "[]")}
+        return json.loads(row[1])
+
+    def put(self, domain, field, value):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR IGNORE INTO domains (domain) VALUES (?)", (domain,))
+            if field == "listing":
+                self._conn.execute(
+                    "UPDATE domains SET status = ?, labels = ?, listing_at = ? WHERE domain = ?",
+                    (value.get("status"), json.dumps(value.get("labels") or []), now, domain))
+            else:
+                self._conn.execute(
+                    f"UPDATE domains SET {field} = ?, {field}_at = ? WHERE domain = ?",
+                    (json.dumps(value), now, domain))
+
+    def put_listing(self, records, stamp=None, complete=True):
+        """
+        Store listAll records. A walk written in several chunks should share one `stamp`
+        and pass `complete=True` only with the last chunk.
+        """
+        now = stamp or time.time()
+        rows = [(r.get("domain"), r.get("status"), json.dumps(r.get("labels") or []), now) for r in records]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO domains (domain, status, labels, listing_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(domain) DO UPDATE SET status = excluded.status, labels = excluded.labels, "
+                "listing_at = excluded.listing_at", rows)
+            if complete:
+                self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('listing_at', ?)", (now,))
+
+    def listing(self):
+        """Return every cached domain record if the last full listing is still fresh, else None."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'listing_at'").fetchone()
+            if not row or not self._fresh(row[0], "listing"):
+                return None
+            rows = self._conn.execute(
+                "SELECT domain, status, labels FROM domains WHERE listing_at >= ? ORDER BY rowid", (row[0],)
+            ).fetchall()
+        return [{"domain": d, "status": s, "labels": json.loads(l or "[]")} for d, s, l in rows]
+
+    def fetch(self, domain, field, loader, valid=lambda value: True):
+        """Return the cached field if fresh; otherwise call `loader()` and cache the result if `valid`."""
+        value = self.get(domain, field)
+        if value is not MISSING:
+            return value
+        value = loader()
+        if valid(value):
+            self.put(domain, field, value)
+        return value
+
+    def invalidate(self, domain, field=None):
+        """Mark one field (or every field) of a domain as stale."""
+        fields = [field] if field else FIELDS
+        with self._lock, self._conn:
+            for f in fields:
+                self._conn.execute(f"UPDATE domains SET {f}_at = NULL WHERE domain = ?", (domain,))
+            if field in (None, "listing"):
+                self._conn.execute("DELETE FROM meta WHERE key = 'listing_at'")
+
+inventory = PorkbunInventory(PORKBUN["INVENTORY_PATH"], PORKBUN["INVENTORY_TTL"])
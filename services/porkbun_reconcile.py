@@ -0,0 +1,101 @@
+from utils.config import PORKBUN
+from services.porkbun_functions import ERROR_RESULTS, add_forwarding, delete_forwarding, get_forwarding
+
+"""
+Desired-state reconciler for Porkbun URL forwards.
+
+Porkbun has no "edit forward" endpoint, so changing a forward means a
+delete plus an add. plan_forwarding() reads a domain's forwards once and
+keeps a root forward that already matches, so a converged domain costs a
+single read and no writes. apply_forwarding() makes only the planned calls.
+"""
+
+def _settings(forward):
+    return {
+        "location": (forward.get("location") or "").rstrip("/"),
+        "type": forward.get("type"),
+        "includePath": forward.get("includePath"),
+        "wildcard": forward.get("wildcard"),
+    }
+
+def desired_forward(location, forward_type=None, include_path=None, wildcard=None):
+    """Build the desired root forward from arguments, falling back to the PORKBUN config."""
+    return {
+        "location": location,
+        "type": forward_type or PORKBUN["FORWARD_TYPE"],
+        "includePath": include_path or PORKBUN["FORWARD_INCLUDE_PATH"],
+        "wildcard": wildcard or PORKBUN["FORWARD_WILDCARD"],
+    }
+
+def read_forwards(domain):
+    """Return every forward on a domain, raising if Porkbun answered with an error."""
+    forwards = get_forwarding(domain, PORKBUN["PORKBUN_KEY"], PORKBUN["PORKBUN_SECRET"])
+    if isinstance(forwards, str) and forwards in ERROR_RESULTS:
+        raise RuntimeError(f"could not read forwards ({forwards})")
+    return forwards or []
+
+def plan_forwarding(domain: str, desired: dict = None) -> dict:
+    """
+    Compare a domain's root forwards with `desired` (see desired_forward).
+    `desired=None` means the domain should have no root forward at all.
+    Forwards on subdomains are left alone.
+
+    Returns:
+        dict: {"domain", "deletes": [forward, ...], "add": desired or None}
+    """
+    root = [f for f in read_forwards(domain) if not f.get("subdomain")]
+    if desired is None:
+        return {"domain": domain, "deletes": root, "add": None}
+
+    target = _settings(desired)
+    keep = next((f for f in root if _settings(f) == target), None)
+    deletes = [f for f in root if f is not keep]
+    return {"domain": domain, "deletes": deletes, "add": None if keep else desired}
+
+def plan_outcome(plan: dict) -> str:
+    """Name what a plan does: unchanged, created, updated or deleted."""
+    if plan["add"] is None:
+        return "deleted" if plan["deletes"] else "unchanged"
+    return "updated" if plan["deletes"] else "created"
+
+def apply_forwarding(plan: dict) -> str:
+    """
+    Apply one domain's plan: delete stale forwards first, then add the desired one.
+
+    Returns:
+        str: the plan outcome
+    """
+    domain = plan["domain"]
+    for forward in plan["deletes"]:
+        status = delete_forwarding(domain, forward.get("id"), PORKBUN["PORKBUN_KEY"], PORKBUN["PORKBUN_SECRET"])
+        if status != "SUCCESS":
+            raise RuntimeError(f"deleting forward {forward.get('id')} returned {status}")
+    desired = plan["add"]
+    if desired:
+        status = add_forwarding(domain, desired["location"], PORKBUN["PORKBUN_KEY"], PORKBUN["PORKBUN_SECRET"],
+                                desired["type"], desired["includePath"], desired["wildcard"])
+        if status != "SUCCESS":
+            raise RuntimeError(f"adding forward to {desired['location']} returned {status}")
+    outcome = plan_outcome(plan)
+    if outcome != "unchanged":
+        print(f"[{domain}] Forwarding {outcome}")
+    return outcome
+
+def print_forwarding_plan(plans: list) -> dict:
+    """
+    Print a dry-run diff for every domain that needs changes and return the outcome counts.
+    """
+    counts = {"created": 0, "updated": 0, "deleted": 0, "unchanged": 0}
+    for plan in plans:
+        counts[plan_outcome(plan)] += 1
+        if plan_outcome(plan) == "unchanged":
+            continue
+        print(f"[{plan['domain']}]")
+        for forward in plan["deletes"]:
+            print(f"  - forward {forward.get('id')} {forward.get('location')} ({forward.get('type')})")
+        if plan["add"]:
+            print(f"  + forward {plan['add']['location']} ({plan['add']['type']})")
+    writes = sum(len(p["deletes"]) + (1 if p["add"] else 0) for p in plans)
+    print(f"📋 Plan: {counts['created']} to create, {counts['updated']} to update, "
+          f"{counts['deleted']} to delete, {counts['unchanged']} unchanged ({writes} writes)")
+    return counts
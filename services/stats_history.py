@@ -0,0 +1,120 @@
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from functools import lru_cache
+from utils.config import EMAILBISON
+
+"""
+Append-only history of Bison domain stats.
+
+Every run is one Parquet file under <dir>/date=YYYY-MM-DD/, sorted by
+domain, plus a line in manifest.json. Comparing two runs only reads those
+two files (and only the columns asked for), so deltas never touch older history.
+"""
+
+HISTORY_COLUMNS = ["workspace_id", "workspace_name", "domain", "accounts", "reply_rate", "ESP", "tags"]
+KEYS = ["workspace_id", "domain"]
+
+class StatsHistory:
+    """
+    The run manifest and Parquet files of the domain stats history under `directory`.
+    """
+    def __init__(self, directory=None):
+        self.directory = directory or EMAILBISON["HISTORY_DIR"]
+        self.manifest_path = os.path.join(self.directory, "manifest.json")
+        self._lock = threading.Lock()
+
+    def runs(self):
+        """Return every recorded run, oldest first: [{"run_id", "date", "path", "rows"}, ...]."""
+        if not os.path.exists(self.manifest_path):
+            return []
+        with open(self.manifest_path) as f:
+            return json.load(f)
+
+    def append(self, df_domains, taken_at=None):
+        """
+        Store one stats run and return its run_id. Past runs are never rewritten.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        taken_at = taken_at or datetime.now(timezone.utc)
+        run_id = taken_at.strftime("%Y%m%dT%H%M%S%fZ")
+        date = taken_at.strftime("%Y-%m-%d")
+        df = df_domains.reset_index(drop=True)
+        df = df[[col for col in HISTORY_COLUMNS if col in df.columns]]
+        df = df.sort_values([key for key in KEYS if key in df.columns], kind="stable", ignore_index=True)
+
+        relative = os.path.join(f"date={date}", f"run={run_id}.parquet")
+        path = os.path.join(self.directory, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), path, compression="zstd")
+
+        with self._lock:
+            runs = self.runs()
+            runs.append({"run_id": run_id, "date": date, "path": relative, "rows": len(df)})
+            tmp = self.manifest_path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(runs, f, indent=1)
+            os.replace(tmp, self.manifest_path)
+        print(f"🗂️ Stats run {run_id} added to history ({len(df)} domains)")
+        return run_id
+
+    def resolve(self, run):
+        """
+        Turn a run reference into a manifest entry: a run_id, a date ("2026-10-18", the last run
+        that day) or a position in the history (-1 is the latest run, -2 the one before).
+        """
+        runs = self.runs()
+        if not runs:
+            raise LookupError(f"No stats runs recorded in {self.directory}")
+        if isinstance(run, int):
+            if not -len(runs) <= run < len(runs):
+                raise LookupError(f"No stats run at position {run} ({len(runs)} recorded)")
+            return runs[run]
+        matches = [r for r in runs if run in (r["run_id"], r["date"])]
+        if not matches:
+            raise LookupError(f"No stats run matches {run!r}")
+        return matches[-1]
+
+    def load(self, run=-1, columns=None):
+        """Return one run's table (optionally only some columns)."""
+        entry = self.resolve(run)
+        return _read_run(os.path.join(self.directory, entry["path"]), tuple(columns) if columns else None).copy()
+
+    def delta(self, old=-2, new=-1, metrics=("accounts", "reply_rate")):
+        """
+        Compare two runs per domain. Returns one row per (workspace_id, domain) seen in either run
+        with `<metric>_old`, `<metric>_new` and `<metric>_change` columns plus a `status`
+        of "added", "removed" or "kept".
+        """
+        columns = KEYS + list(metrics)
+        before = self.load(old, columns)
+        after = self.load(new, columns)
+        keys = [key for key in KEYS if key in before.columns and key in after.columns]
+        merged = before.merge(after, on=keys, how="outer", suffixes=("_old", "_new"), indicator=True)
+        for metric in metrics:
+            merged[f"{metric}_change"] = merged[f"{metric}_new"] - merged[f"{metric}_old"]
+        merged["status"] = merged.pop("_merge").map({"left_only": "removed", "right_only": "added", "both": "kept"})
+        return merged
+
+    def top_reply_rate_drops(self, old=-2, new=-1, n=20):
+        """Return the `n` domains whose reply rate fell the most between two runs."""
+        changes = self.delta(old, new, metrics=("reply_rate",))
+        changes = changes[(changes["status"] == "kept") & (changes["reply_rate_change"] < 0)]
+        return changes.nsmallest(n, "reply_rate_change").reset_index(drop=True)
+
+    def lost_accounts(self, old=-2, new=-1):
+        """Return domains with fewer accounts than before (including domains that disappeared), biggest loss first."""
+        changes = self.delta(old, new, metrics=("accounts",))
+        changes["accounts_change"] = changes["accounts_change"].fillna(-changes["accounts_old"])
+        lost = changes[changes["accounts_change"] < 0]
+        return lost.sort_values("accounts_change", kind="stable").reset_index(drop=True)
+
+@lru_cache(maxsize=8)
+def _read_run(path, columns):
+    # Runs are never rewritten, so a file read once can be reused for every later query.
+    import pyarrow.parquet as pq
+    table = pq.read_table(path, columns=list(columns) if columns else None)
+    return table.to_pandas()
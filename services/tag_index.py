@@ -0,0 +1,167 @@
+from collections.abc import Sequence
+import numpy as np
+import pandas as pd
+
+"""
+Tag dictionary and bitmaps for Bison accounts and domains.
+
+Every tag name gets a bit. Accounts and domains hold their tags as rows of
+uint64 words, so a domain's common tags are the bitwise AND of its accounts
+and a tag query is a couple of vectorized mask tests over the domain rows.
+"""
+
+WORD_BITS = 64
+
+def _as_names(tags):
+    """
+    Reduce one account's tags to a hashable tuple of names. Accepts name tuples, raw lists of
+    tag dicts and any other non-string sequence (e.g. the ndarrays a Parquet report reads back as).
+    """
+    if isinstance(tags, tuple):
+        return tags
+    if isinstance(tags, (str, bytes, dict)) or not isinstance(tags, (Sequence, np.ndarray)):
+        return ()
+    return tuple(tag["name"] if isinstance(tag, dict) else tag for tag in tags
+                 if not isinstance(tag, dict) or "name" in tag)
+
+def _tag_sets(tags):
+    """
+    Factorize a column of tag lists into (row -> set code, distinct sets as tuples).
+    Accounts share a handful of distinct tag sets, so everything after this works per set.
+    """
+    values = tags.to_numpy()
+    try:
+        codes, sets = pd.factorize(values)
+    except TypeError:
+        # Raw API tags (and the stats `tags` column) are lists, which are not hashable.
+        codes, sets = pd.factorize(pd.Series([_as_names(t) for t in values], dtype=object))
+    return codes, [_as_names(s) for s in sets]
+
+def _pack(matrix):
+    """Pack a (rows x tags) boolean matrix into (rows x words) uint64 bitmaps."""
+    words = max(1, -(-matrix.shape[1] // WORD_BITS))
+    bits = np.zeros((matrix.shape[0], words), dtype=np.uint64)
+    for w in range(words):
+        block = matrix[:, w * WORD_BITS:(w + 1) * WORD_BITS].astype(np.uint64)
+        weights = np.left_shift(np.uint64(1), np.arange(block.shape[1], dtype=np.uint64))
+        bits[:, w] = (block * weights).sum(axis=1, dtype=np.uint64)
+    return bits
+
+def _unpack(bits, n_tags):
+    """Turn (rows x words) bitmaps back into a (rows x tags) boolean matrix."""
+    shifts = np.arange(WORD_BITS, dtype=np.uint64)
+    matrix = (bits[:, :, None] >> shifts) & np.uint64(1)
+    # Explicit sizes: -1 cannot be inferred when there are no rows.
+    return matrix.reshape(bits.shape[0], bits.shape[1] * WORD_BITS)[:, :n_tags].astype(bool)
+
+def _reduce_by_group(bits, codes, n_groups, op):
+    """Combine account bitmaps per group code with `op` (np.bitwise_and / np.bitwise_or)."""
+    out = np.zeros((n_groups, bits.shape[1]), dtype=np.uint64)
+    valid = codes >= 0
+    if not valid.any():
+        return out
+    order = np.argsort(codes[valid], kind="stable")
+    grouped = codes[valid][order]
+    starts = np.flatnonzero(np.r_[True, grouped[1:] != grouped[:-1]])
+    out[grouped[starts]] = op.reduceat(bits[valid][order], starts, axis=0)
+    return out
+
+class TagIndex:
+    """
+    Tag names (bit i = names[i]) plus two bitmaps per domain: the tags every account
+    carries (`common`, what the stats report) and the tags any account carries (`carried`).
+    Per-account bitmaps are kept when the index is built from accounts.
+    """
+    def __init__(self, names, domains, common, carried, set_bits=None, set_codes=None):
+        self.names = np.asarray(names, dtype=object)
+        self.bit = {name: i for i, name in enumerate(self.names)}
+        self.domains = pd.Index(domains, dtype=object, name="domain")
+        self.common = common
+        self.carried = carried
+        self._set_bits = set_bits
+        self._set_codes = set_codes
+
+    @property
+    def account_bits(self):
+        """Per-account bitmaps (only when built from accounts), expanded from the distinct tag sets on demand."""
+        if self._set_bits is None:
+            return None
+        return self._set_bits[self._set_codes]
+
+    @classmethod
+    def _from_sets(cls, codes, sets):
+        names = sorted({name for s in sets for name in s})
+        bit = {name: i for i, name in enumerate(names)}
+        matrix = np.zeros((len(sets) + 1, len(names)), dtype=bool)
+        for i, s in enumerate(sets):
+            matrix[i, [bit[name] for name in s]] = True
+        # The extra all-zero row is where factorize's -1 (no tags) lands.
+        return names, _pack(matrix)
+
+    @classmethod
+    def from_accounts(cls, df_accounts):
+        """Build the index from an accounts frame (compact or raw)."""
+        set_codes, sets = _tag_sets(df_accounts["tags"])
+        names, set_bits = cls._from_sets(set_codes, sets)
+        domain_codes, domains = pd.factorize(df_accounts["domain"])
+        # Reduce over distinct (domain, tag set) pairs rather than accounts: AND/OR ignore repeats.
+        valid = domain_codes >= 0
+        stride = len(sets) + 1
+        pairs = pd.unique(domain_codes[valid].astype(np.int64) * stride + (set_codes[valid] + 1))
+        pair_domains, pair_sets = np.divmod(pairs, stride)
+        # Shifted back, "no tags" (-1) indexes the all-zero last row.
+        pair_bits = set_bits[pair_sets - 1]
+        common = _reduce_by_group(pair_bits, pair_domains, len(domains), np.bitwise_and)
+        carried = _reduce_by_group(pair_bits, pair_domains, len(domains), np.bitwise_or)
+        return cls(names, domains.astype(object), common, carried, set_bits, set_codes)
+
+    @classmethod
+    def from_stats(cls, df_domains):
+        """Build the index from a stats table's `tags` column (one row per domain, no accounts needed)."""
+        codes, sets = _tag_sets(df_domains["tags"])
+        names, set_bits = cls._from_sets(codes, sets)
+        bits = set_bits[codes]
+        return cls(names, df_domains["domain"].to_numpy(), bits, bits)
+
+    def mask(self, tags):
+        """Return the bitmap of `tags`, or None if one of them is not in the dictionary."""
+        bits = np.zeros(self.common.shape[1], dtype=np.uint64)
+        for tag in tags:
+            if tag not in self.bit:
+                return None
+            i = self.bit[tag]
+            bits[i // WORD_BITS] |= np.uint64(1) << np.uint64(i % WORD_BITS)
+        return bits
+
+    def query(self, all_of=(), any_of=(), none_of=(), every_account=True):
+        """
+        Return the domains carrying every tag in `all_of`, at least one of `any_of` and none of `none_of`.
+        With `every_account` (the default) a domain carries a tag only if all its accounts do,
+        matching the stats `tags` column; otherwise one account is enough.
+        """
+        bits = self.common if every_account else self.carried
+        keep = np.ones(len(bits), dtype=bool)
+        if all_of:
+            need = self.mask(all_of)
+            if need is None:
+                return self.domains[:0]
+            keep &= ((bits & need) == need).all(axis=1)
+        if any_of:
+            known = [tag for tag in any_of if tag in self.bit]
+            if not known:
+                return self.domains[:0]
+            keep &= ((bits & self.mask(known)) != 0).any(axis=1)
+        if none_of:
+            banned = self.mask([tag for tag in none_of if tag in self.bit])
+            keep &= ((bits & banned) == 0).all(axis=1)
+        return self.domains[keep]
+
+    def domain_tags(self, domains=None, every_account=True):
+        """Return each domain's tag names as a list, for `domains` (default: all, in index order)."""
+        bits = self.common if every_account else self.carried
+        if domains is not None:
+            positions = self.domains.get_indexer(pd.Index(domains, dtype=object))
+            # Unknown domains get an empty bitmap instead of wrapping around to the last row.
+            bits = np.where((positions >= 0)[:, None], bits[positions], np.uint64(0))
+        matrix = _unpack(bits, len(self.names))
+        return [list(self.names[row]) for row in matrix]
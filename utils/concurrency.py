@@ -0,0 +1,35 @@
+from concurrent.futures import ThreadPoolExecutor
+
+# ---------------------- Batch Runner --------------------------------------
+
+def _run_one(task, domain):
+    try:
+        return {"domain": domain, "ok": True, "result": task(domain), "error": None}
+    except Exception as e:
+        return {"domain": domain, "ok": False, "result": None, "error": e}
+
+def run_for_domains(task, domains, max_workers=1, stats=None):
+    """
+    This is the function for running `task(domain)` over every domain with at most `max_workers` in flight.
+    A failing domain is recorded instead of stopping the batch. Results come back in input order.
+    `stats` is an optional callable (e.g. cf_retry_stats) whose counters are printed after the summary.
+    """
+    domains = list(domains)
+    if max_workers <= 1:
+        results = [_run_one(task, domain) for domain in domains]
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(lambda domain: _run_one(task, domain), domains))
+    print_summary(results, stats() if stats else None)
+    return results
+
+def print_summary(results, stats=None):
+    """
+    This is the function for printing how many domains succeeded and which ones failed.
+    """
+    failed = [r for r in results if not r["ok"]]
+    print(f"✅ {len(results) - len(failed)} succeeded, ❌ {len(failed)} failed")
+    for r in failed:
+        print(f"    • {r['domain']}: {r['error']}")
+    if stats:
+        print("📈 " + ", ".join(f"{k}={v:.0%}" if isinstance(v, float) else f"{k}={v}" for k, v in stats.items()))
@@ -8,10 +8,27 @@ PORKBUN = {
     "PORKBUN_SECRET": os.getenv("PORKBUN_SECRET"), # The API secret for Porkbun
     "ADD_FORWARDING": False, # For adding forwarding in Porkbun
     "CHANGE_FORWARDING": False, # For changing forwarding in Porkbun
-    "DELETE_FORWARDING": False # For deleting forwarding in Porkbun
+    "DELETE_FORWARDING": False, # For deleting forwarding in Porkbun
+    "RECONCILE_FORWARDING": False, # For converging forwards to TARGET_URL with only the needed deletes/adds
+    "DRY_RUN": True, # For only printing the forwarding plan without applying it
+    "FORWARD_TYPE": "temporary", # Desired forward type: "temporary" (302) or "permanent" (301)
+    "FORWARD_INCLUDE_PATH": "no", # Desired includePath setting for forwards
+    "FORWARD_WILDCARD": "yes", # Desired wildcard setting for forwards
+    "MAX_WORKERS": 4, # Porkbun calls in flight at once (all share the rate limit below)
+    "RATE_PER_SECOND": 1, # Porkbun requests per second across every endpoint and worker
+    "BURST": 2, # Requests allowed back to back before the rate applies
+    "MAX_RETRIES": 5, # Retries for rate-limited Porkbun responses
+    "INVENTORY_PATH": "porkbun_inventory.sqlite", # Local cache of Porkbun domain state
+    "INVENTORY_TTL": { # Seconds each cached field stays fresh
+        "listing": 6 * 60 * 60,
+        "nameservers": 24 * 60 * 60,
+        "forwards": 24 * 60 * 60,
+        "dns_records": 24 * 60 * 60
+    }
 }
 
 CLOUDFLARE = {
+    "API_BASE": os.getenv("CF_API_BASE", "https://api.cloudflare.com/client/v4"), # Point at a local stub for testing
     "CF_EMAIL": os.getenv("CF_EMAIL"), # Your CF email
     "CF_API_TOKEN": os.getenv("CF_API_TOKEN"), # The API token value for CF
     "CF_GLOBAL_KEY": os.getenv("CF_GLOBAL_KEY"), # The global key value for CF
@@ -19,13 +36,30 @@ CLOUDFLARE = {
     "IP": "192.0.2.1", # Manually set IP Address for A Record
     "TARGET_URL": "https://sylforfun.com/", # For adding or deleting page rule/forwarding
     "NEW_TARGET_URL": "https://sylfeelingfunnow.com/", # For updating the page rule
+    "OLD_TARGET_URL": None, # Only touch page rules forwarding here when PAGE_RULE_SELECT is "match_url"
+    "PAGE_RULE_SELECT": "prompt", # Which matching page rules to update/delete: "prompt", "all", "highest_priority" or "match_url"
     "ADD_PAGERULE": False, # For adding a page rule
     "CHANGE_PAGERULE": False, # For changing a page rule
     "DELETE_PAGERULE": False, # For deleting a page rule
     "ADD_A_RECORD": False, # For adding an A Record
     "CHANGE_A_RECORD": False, # For changing an A Record
     "DELETE_A_RECORD": False, # For deleting an A Record
-    "CHANGE_NAMESERVERS": False # For changing nameservers
+    "CHANGE_NAMESERVERS": False, # For changing nameservers
+    "RECONCILE": False, # For converging A records and page rules to IP / PROXIED / TARGET_URL
+    "DRY_RUN": True, # For only printing the reconcile plan without applying it
+    "PROXIED": True, # Desired proxy flag for A records when reconciling
+    "USE_ZONE_INDEX": True, # For answering zone lookups from the local zone index
+    "ZONE_INDEX_AUTO_WARM": True, # For loading every zone from /zones on the first cold lookup
+    "ZONE_INDEX_PATH": "cloudflare_zones.json", # Where the domain -> zone index is stored
+    "ZONE_INDEX_TTL": 24 * 60 * 60, # Seconds before a cached zone entry is looked up again
+    "SNAPSHOT_TTL": 5 * 60, # Seconds a zone's DNS records / page rules are reused before being read again
+    "MAX_WORKERS": 1, # Domains processed at once by the Cloudflare workflows (1 = one at a time)
+    "RATE_LIMIT": 1200, # Max Cloudflare requests per RATE_PERIOD, shared by all workers
+    "RATE_PERIOD": 300, # Seconds in the Cloudflare rate-limit window
+    "MAX_RETRIES": 5, # Retries for 429 / transient 5xx responses before raising CloudflareAPIError
+    "BACKOFF_BASE": 1, # Seconds for the first backoff (doubles each retry, with jitter)
+    "BACKOFF_MAX": 60, # Longest single wait between retries
+    "ASYNC_MAX_IN_FLIGHT": 100 # Max concurrent requests from the async Cloudflare client
 }
 
 EMAILGUARD = {
@@ -38,7 +72,31 @@ EMAILGUARD = {
 
 EMAILBISON = {
     "BISON_API_KEY": os.getenv("BISON_KEY"), # The API key for a workspace in EmailBison
-    "GRAB_DOMAINS": False # For grabbing domains from a workspace in EmailBison
+    "BISON_API_KEYS": [k.strip() for k in os.getenv("BISON_KEYS", "").split(",") if k.strip()] or [os.getenv("BISON_KEY")], # One key per workspace (comma-separated BISON_KEYS), defaults to BISON_KEY
+    "MAX_WORKSPACES": 4, # Workspaces paginated and calculated at once
+    "GRAB_DOMAINS": False, # For grabbing domains from a workspace in EmailBison
+    "MAX_WORKERS": 8, # Sender-email pages fetched at once after the first page
+    "MAX_RETRIES": 5, # Retries for 429 / transient 5xx responses on a single page
+    "PAGE_RETRIES": 2, # Extra rounds for pages that still failed, refetched on their own
+    "STREAM_STATS": False, # For folding each page into per-domain totals instead of keeping accounts (skips the snapshot)
+    "INCREMENTAL": False, # For recomputing stats only for domains whose accounts changed since the last run
+    "SNAPSHOT_DIR": "bison_snapshots", # Where the last accounts/domain tables of each workspace are kept
+    "KEEP_HISTORY": False, # For appending every stats run to the history store (needs pyarrow)
+    "HISTORY_DIR": "stats_history" # Where the domain stats history is kept, one folder per date
+}
+
+REPORTS = {
+    "FORMAT": "csv", # Report output: "csv", "parquet" or "arrow" (parquet/arrow need pyarrow)
+    "COMPRESSION": "zstd", # Parquet/Arrow compression codec
+    "PARTITION_BY_WORKSPACE": False, # For writing bison_domains as one file per workspace_id
+    "CHUNK_ROWS": 50000 # Rows written per chunk / row group
+}
+
+TRANSPORT = {
+    "POOL_CONNECTIONS": 10, # Number of host pools kept per provider session
+    "POOL_MAXSIZE": 32, # Max keep-alive connections per host (raise this for threaded runs)
+    "CONNECT_TIMEOUT": 10, # Seconds to wait for a connection
+    "READ_TIMEOUT": 60 # Seconds to wait for a response
 }
 
 DOMAINS = ["sylnow.com"] # The domains to be used in the script (representation of the domains they choose to use)
\ No newline at end of file
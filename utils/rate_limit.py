@@ -0,0 +1,111 @@
+import asyncio
+import threading
+import time
+from collections import deque
+
+class RateLimiter:
+    """
+    This is a thread-safe sliding-window limiter: at most `max_calls` in any `period` seconds.
+    """
+    def __init__(self, max_calls, period):
+        self.max_calls = max_calls
+        self.period = period
+        self._calls = deque()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """
+        This is the function for taking a slot without blocking: returns 0 if the call fits in the
+        window (and counts it), otherwise the seconds to wait before trying again.
+        """
+        with self._lock:
+            now = time.monotonic()
+            while self._calls and now - self._calls[0] >= self.period:
+                self._calls.popleft()
+            if len(self._calls) < self.max_calls:
+                self._calls.append(now)
+                return 0
+            return self.period - (now - self._calls[0])
+
+    def acquire(self):
+        """
+        This is the function for blocking until one more call fits in the window.
+        """
+        while True:
+            wait = self.reserve()
+            if not wait:
+                return
+            time.sleep(wait)
+
+    def usage(self):
+        """
+        This is the fraction of the current window already used (1.0 = at the limit).
+        """
+        with self._lock:
+            now = time.monotonic()
+            while self._calls and now - self._calls[0] >= self.period:
+                self._calls.popleft()
+            return len(self._calls) / self.max_calls
+
+class TokenBucket:
+    """
+    This is a thread-safe, adaptive token bucket: `rate` tokens per second, bursting up to `capacity`.
+    When a response looks throttled the rate is halved (down to `min_rate`); each normal response
+    then nudges it back toward the configured rate.
+    """
+    def __init__(self, rate, capacity=1, min_rate=None, is_throttled=None):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate or rate / 16
+        self.capacity = capacity
+        self.is_throttled = is_throttled or (lambda response: response.status_code == 429)
+        self.throttled = 0
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        This is the function for blocking until a token is available, then taking it.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def observe(self, response):
+        """
+        This is the function the session calls after every response to adapt the rate.
+        """
+        with self._lock:
+            if self.is_throttled(response):
+                self.throttled += 1
+                self.rate = max(self.min_rate, self.rate / 2)
+                self._tokens = 0
+                print(f"🐢 Rate limited – slowing down to {self.rate:.2f} req/s")
+            elif self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+class AsyncRateLimiter:
+    """
+    This is the asyncio front end of a RateLimiter: coroutines wait on the event loop instead of
+    blocking it, and their calls count against the same window as the threads using `limiter`.
+    """
+    def __init__(self, limiter):
+        self.limiter = limiter
+
+    async def acquire(self):
+        """
+        This is the function for waiting until one more call fits in the shared window.
+        """
+        while True:
+            wait = self.limiter.reserve()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
@@ -0,0 +1,177 @@
+import os
+import pandas as pd
+from utils.config import REPORTS
+
+# ---------------------- Report Writers --------------------------------------
+
+def _partition_value(value):
+    if pd.isna(value):
+        return "__null__"
+    if isinstance(value, float) and value.is_integer():
+        # A column with missing ids is float, but the partition should still read workspace_id=12.
+        return int(value)
+    return value
+
+class ReportWriter:
+    """
+    This is the base report writer: chunks go in through `write(df)` and are routed to one
+    open file per partition (or a single file), so the whole report never has to be in memory.
+    Subclasses only open, append to and close one file.
+    """
+    extension = None
+
+    def __init__(self, name, partition_cols=None, compression=None):
+        self.name = name
+        self.partition_cols = list(partition_cols or [])
+        self.compression = compression or REPORTS["COMPRESSION"]
+        self._files = {}
+
+    def _path(self, key):
+        if not self.partition_cols:
+            return f"{self.name}.{self.extension}"
+        parts = [f"{col}={_partition_value(value)}" for col, value in zip(self.partition_cols, key)]
+        directory = os.path.join(self.name, *parts)
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, f"part-0.{self.extension}")
+
+    def write(self, df):
+        if df.empty:
+            return
+        if not self.partition_cols:
+            self._append(None, df)
+            return
+        # Partition columns may also be index levels (e.g. the workspace_id index), so group on the columns only.
+        for key, chunk in df.reset_index(drop=True).groupby(self.partition_cols, dropna=False, sort=False):
+            key = key if isinstance(key, tuple) else (key,)
+            self._append(key, chunk.drop(columns=self.partition_cols))
+
+    def _append(self, key, df):
+        handle = self._files.get(key)
+        if handle is None:
+            handle = self._files[key] = self._open(self._path(key), df)
+        self._write(handle, df)
+
+    def close(self):
+        for handle in self._files.values():
+            self._close(handle)
+        self._files.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _open(self, path, first_chunk):
+        raise NotImplementedError
+
+    def _write(self, handle, df):
+        raise NotImplementedError
+
+    def _close(self, handle):
+        pass
+
+class CsvReportWriter(ReportWriter):
+    """
+    This is the CSV writer (list columns end up as their Python repr, as before).
+    """
+    extension = "csv"
+
+    def _open(self, path, first_chunk):
+        return {"path": path, "header": True}
+
+    def _write(self, handle, df):
+        df.to_csv(handle["path"], mode="w" if handle["header"] else "a", header=handle["header"], index=False)
+        handle["header"] = False
+
+def _arrow_schema(pa, df):
+    """
+    This is the function for fixing the Arrow schema from the first chunk. Columns that are all
+    empty lists or all nulls there are widened to list<string>/string so later chunks still fit.
+    """
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    for i, field in enumerate(schema):
+        if pa.types.is_null(field.type):
+            schema = schema.set(i, pa.field(field.name, pa.string()))
+        elif pa.types.is_list(field.type) and pa.types.is_null(field.type.value_type):
+            schema = schema.set(i, pa.field(field.name, pa.list_(pa.string())))
+    return schema.remove_metadata()
+
+def _plain(df):
+    # Categoricals are written as their values so every chunk shares one plain schema.
+    return df.assign(**{col: df[col].astype(object) for col in df.columns
+                        if isinstance(df[col].dtype, pd.CategoricalDtype)})
+
+def _to_table(pa, df, schema):
+    return pa.Table.from_pandas(_plain(df), schema=schema, preserve_index=False)
+
+class ParquetReportWriter(ReportWriter):
+    """
+    This is the Parquet writer: real list columns, compressed, one row group per chunk.
+    """
+    extension = "parquet"
+
+    def _open(self, path, first_chunk):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        schema = _arrow_schema(pa, _plain(first_chunk))
+        return pa, schema, pq.ParquetWriter(path, schema, compression=self.compression)
+
+    def _write(self, handle, df):
+        pa, schema, writer = handle
+        writer.write_table(_to_table(pa, df, schema))
+
+    def _close(self, handle):
+        handle[2].close()
+
+class ArrowReportWriter(ReportWriter):
+    """
+    This is the Arrow IPC (Feather v2) writer, one record batch per chunk.
+    """
+    extension = "arrow"
+
+    def _open(self, path, first_chunk):
+        import pyarrow as pa
+        schema = _arrow_schema(pa, _plain(first_chunk))
+        options = pa.ipc.IpcWriteOptions(compression=self.compression if self.compression in ("lz4", "zstd") else None)
+        sink = pa.OSFile(path, "wb")
+        return pa, schema, sink, pa.ipc.new_file(sink, schema, options=options)
+
+    def _write(self, handle, df):
+        pa, schema, _, writer = handle
+        writer.write_table(_to_table(pa, df, schema))
+
+    def _close(self, handle):
+        handle[3].close()
+        handle[2].close()
+
+WRITERS = {
+    "csv": CsvReportWriter,
+    "parquet": ParquetReportWriter,
+    "arrow": ArrowReportWriter,
+}
+
+def register_writer(fmt, writer_class):
+    """
+    This is the function for plugging in another output format (a ReportWriter subclass).
+    """
+    WRITERS[fmt] = writer_class
+
+def open_report(name, fmt=None, partition_cols=None, compression=None):
+    """
+    This is the function for opening a report writer, e.g. `with open_report("bison_domains") as report: report.write(df)`.
+    `name` has no extension; partitioned reports become a directory of that name.
+    """
+    fmt = fmt or REPORTS["FORMAT"]
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown report format {fmt!r}, expected one of {sorted(WRITERS)}")
+    return WRITERS[fmt](name, partition_cols, compression)
+
+def write_report(df, name, fmt=None, partition_cols=None, compression=None, chunk_rows=None):
+    """
+    This is the function for writing a whole frame as a report, `chunk_rows` rows at a time.
+    """
+    chunk_rows = chunk_rows or REPORTS["CHUNK_ROWS"]
+    with open_report(name, fmt, partition_cols, compression) as report:
+        for start in range(0, len(df), chunk_rows):
+            report.write(df.iloc[start:start + chunk_rows])
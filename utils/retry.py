@@ -0,0 +1,83 @@
+import random
+import threading
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+class RetryPolicy:
+    """
+    This is a shared retry policy: exponential backoff with full jitter, honoring Retry-After.
+    Rate-limit statuses (429 by default) are retried for every method; other 5xx and
+    connection errors only for idempotent ones. `is_throttled(response)` can flag provider-specific
+    throttle responses (e.g. a 400 whose body mentions the limit) as rate limited too.
+    Every retry is counted in `stats` so we can see how close a run gets to the limit.
+    """
+    def __init__(self, name, max_retries=5, backoff_base=1.0, backoff_max=60.0,
+                 retry_statuses=(429, 500, 502, 503, 504), rate_limit_statuses=(429,), is_throttled=None):
+        self.name = name
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_statuses = set(retry_statuses)
+        self.rate_limit_statuses = set(rate_limit_statuses)
+        self.is_throttled = is_throttled
+        self.stats = {"requests": 0, "retries": 0, "rate_limited": 0, "server_errors": 0,
+                      "connection_errors": 0, "gave_up": 0}
+        self._lock = threading.Lock()
+
+    def record(self, key, n=1):
+        with self._lock:
+            self.stats[key] += n
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats)
+
+    def should_retry(self, method, attempt, status=None, error=None, response=None):
+        """
+        This is the function for deciding whether a failed attempt gets another try (and counting it).
+        """
+        if error is not None:
+            retryable = method.upper() in IDEMPOTENT_METHODS
+            key = "connection_errors"
+        elif status in self.rate_limit_statuses or (
+                response is not None and self.is_throttled is not None and self.is_throttled(response)):
+            retryable = True
+            key = "rate_limited"
+        elif status in self.retry_statuses:
+            retryable = method.upper() in IDEMPOTENT_METHODS
+            key = "server_errors"
+        else:
+            return False
+        self.record(key)
+        if not retryable or attempt >= self.max_retries:
+            self.record("gave_up")
+            return False
+        self.record("retries")
+        return True
+
+    def delay(self, attempt, retry_after=None):
+        """
+        This is the function for how long to wait before retry number `attempt` (0-based).
+        """
+        wait = parse_retry_after(retry_after)
+        if wait is not None:
+            return min(wait, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+def parse_retry_after(value):
+    """
+    This is the function for turning a Retry-After header (seconds or HTTP date) into seconds.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
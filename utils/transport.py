@@ -0,0 +1,92 @@
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from utils.config import TRANSPORT
+
+# ---------------------- Pooled Sessions --------------------------------------
+
+class ProviderSession(requests.Session):
+    """
+    This is a requests session with a keep-alive connection pool, a default timeout,
+    an optional rate limiter that every request waits on (and that may `observe` each response)
+    and an optional retry policy.
+    """
+    def __init__(self, headers=None, pool_connections=None, pool_maxsize=None, timeout=None, limiter=None, retry=None):
+        super().__init__()
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections or TRANSPORT["POOL_CONNECTIONS"],
+            pool_maxsize=pool_maxsize or TRANSPORT["POOL_MAXSIZE"],
+        )
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+        self.timeout = timeout or (TRANSPORT["CONNECT_TIMEOUT"], TRANSPORT["READ_TIMEOUT"])
+        self.limiter = limiter
+        self.retry = retry
+        if headers:
+            self.headers.update(headers)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        attempt = 0
+        while True:
+            if self.limiter is not None:
+                self.limiter.acquire()
+            if self.retry is not None:
+                self.retry.record("requests")
+            try:
+                response = super().request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if self.retry is None or not self.retry.should_retry(method, attempt, error=e):
+                    raise
+                wait = self.retry.delay(attempt)
+                print(f"⏳ {self.retry.name}: {type(e).__name__} – retry {attempt + 1}/{self.retry.max_retries} in {wait:.1f}s")
+            else:
+                if hasattr(self.limiter, "observe"):
+                    self.limiter.observe(response)
+                if self.retry is None or not self.retry.should_retry(method, attempt, status=response.status_code, response=response):
+                    return response
+                wait = self.retry.delay(attempt, response.headers.get("Retry-After"))
+                print(f"⏳ {self.retry.name}: HTTP {response.status_code} – retry {attempt + 1}/{self.retry.max_retries} in {wait:.1f}s")
+                response.close()
+            time.sleep(wait)
+            attempt += 1
+
+_sessions = {}
+_lock = threading.Lock()
+
+def get_session(provider, headers=None, limiter=None, retry=None):
+    """
+    This is the function for getting the shared session of a provider.
+    `headers` may be a dict or a callable returning one. `headers`, `limiter` and `retry` are only used when the session is first built.
+    """
+    session = _sessions.get(provider)
+    if session is not None:
+        return session
+    with _lock:
+        session = _sessions.get(provider)
+        if session is None:
+            if callable(headers):
+                headers = headers()
+            session = ProviderSession(headers=headers, limiter=limiter, retry=retry)
+            _sessions[provider] = session
+    return session
+
+def reset_session(provider):
+    """
+    This is the function for closing a provider's session so the next call rebuilds it (e.g. after rotating keys).
+    """
+    with _lock:
+        session = _sessions.pop(provider, None)
+    if session is not None:
+        session.close()
+
+def close_sessions():
+    """
+    This is the function for closing every pooled session.
+    """
+    with _lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()